@@ -0,0 +1,36 @@
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+
+from api.cache import get_api_cache, get_object_label, get_versions
+
+USER_KEY = 'auth_user:{label}:{version}'
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация, берущая пользователя из кэша.
+
+    Ключ включает версию пользователя, которую сигналы меняют при
+    любом сохранении или удалении, поэтому смена роли или блокировка
+    действуют со следующего запроса.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Token contained no recognizable user identification'
+            )
+        label = get_object_label(self.user_model, user_id)
+        key = USER_KEY.format(label=label, version=get_versions([label])[0])
+        cache = get_api_cache()
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        elif not user.is_active:
+            raise AuthenticationFailed('User is inactive',
+                                       code='user_inactive')
+        return user
@@ -0,0 +1,325 @@
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+
+from django.db import connection
+from django.db.models import Count
+
+from api.cache import (get_local_snapshot, has_foreign_writes,
+                       is_snapshot_expired)
+from reviews.constants import AUTOCOMPLETE_MAX_LIMIT
+from reviews.models import Category, Genre, Title
+
+INDEXED_MODELS = (Category, Genre, Title)
+KINDS = {Category: 'category', Genre: 'genre', Title: 'title'}
+WORD_RE = re.compile(r'\w+')
+# Prefixes up to this length keep their best matches precomputed: they
+# match too many keys to rank them per lookup.
+TOP_PREFIX_LENGTH = 3
+
+
+def get_keys(name):
+    """Ключи названия: хвосты, начинающиеся с каждого слова.
+
+    Поэтому "оре" находит "Крепкий орешек", а "крепкий оре" — тоже.
+    """
+    words = WORD_RE.findall(name.casefold())
+    return {' '.join(words[start:]) for start in range(len(words))}
+
+
+def get_top_keys(ref, name):
+    """Списки лучших совпадений, в которые входит название."""
+    return {
+        (key[:length], kind)
+        for key in get_keys(name)
+        for length in range(1, min(len(key), TOP_PREFIX_LENGTH) + 1)
+        for kind in (None, ref[0])
+    }
+
+
+def get_rank(ref, item):
+    # Lists sort by rank: heavier first, then by name.
+    return (-item['weight'], item['name'], *ref)
+
+
+class IndexState:
+    """Ключи названий и лучшие совпадения коротких префиксов.
+
+    Лучшие AUTOCOMPLETE_MAX_LIMIT совпадений каждого префикса длиной
+    до TOP_PREFIX_LENGTH (всех типов и каждого типа) хранятся
+    отсортированными и поправляются при каждой записи. Список, из
+    которого ушёл участник с неизвестной заменой, пересчитывается
+    при следующем поиске.
+    """
+    def __init__(self, items):
+        self.items = items
+        self.keys = sorted(
+            (key, *ref) for ref, item in items.items()
+            for key in get_keys(item['name'])
+        )
+        self.tops = {}
+        ranks = {ref: get_rank(ref, item) for ref, item in items.items()}
+        for length in range(1, TOP_PREFIX_LENGTH + 1):
+            # One ref has several keys with the same prefix.
+            groups = {}
+            for key, kind, pk in self.keys:
+                if len(key) >= length:
+                    groups.setdefault(key[:length], set()).add((kind, pk))
+            for prefix, refs in groups.items():
+                self.tops[(prefix, None)] = heapq.nsmallest(
+                    AUTOCOMPLETE_MAX_LIMIT, map(ranks.__getitem__, refs)
+                )
+                for kind in KINDS.values():
+                    self.tops[(prefix, kind)] = heapq.nsmallest(
+                        AUTOCOMPLETE_MAX_LIMIT,
+                        (ranks[ref] for ref in refs if ref[0] == kind)
+                    )
+
+    def replace(self, ref, item):
+        """Заменяет (item=None — удаляет) запись о названии."""
+        old = self.items.pop(ref, None)
+        if old is not None:
+            for key in get_keys(old['name']):
+                position = bisect_left(self.keys, (key, *ref))
+                if (position < len(self.keys)
+                        and self.keys[position] == (key, *ref)):
+                    del self.keys[position]
+        if item is not None:
+            self.items[ref] = item
+            for key in get_keys(item['name']):
+                insort(self.keys, (key, *ref))
+        self.update_tops(ref, old, item)
+
+    def update_tops(self, ref, old, new):
+        old_keys = get_top_keys(ref, old['name']) if old else set()
+        new_keys = get_top_keys(ref, new['name']) if new else set()
+        for top_key in old_keys | new_keys:
+            top = self.tops.get(top_key)
+            if top is None:
+                continue
+            # A full list has left out matches ranked below its last one.
+            cutoff = top[-1] if len(top) >= AUTOCOMPLETE_MAX_LIMIT else None
+            removed = False
+            if top_key in old_keys:
+                rank = get_rank(ref, old)
+                position = bisect_left(top, rank)
+                if position < len(top) and top[position] == rank:
+                    del top[position]
+                    removed = True
+            if top_key in new_keys:
+                rank = get_rank(ref, new)
+                if cutoff is None or rank < cutoff:
+                    insort(top, rank)
+                    del top[AUTOCOMPLETE_MAX_LIMIT:]
+            if removed and cutoff is not None and len(
+                    top) < AUTOCOMPLETE_MAX_LIMIT:
+                del self.tops[top_key]
+
+    def set_weight(self, ref, weight):
+        item = self.items.get(ref)
+        if item is not None and item['weight'] != weight:
+            self.replace(ref, {**item, 'weight': weight})
+
+    def scan(self, prefix, kind, limit):
+        ranks = set()
+        position = bisect_left(self.keys, (prefix,))
+        while (position < len(self.keys)
+               and self.keys[position][0].startswith(prefix)):
+            ref = self.keys[position][1:]
+            if kind is None or ref[0] == kind:
+                ranks.add(get_rank(ref, self.items[ref]))
+            position += 1
+        return heapq.nsmallest(limit, ranks)
+
+    def search(self, prefix, limit, kind=None):
+        if len(prefix) > TOP_PREFIX_LENGTH:
+            # Longer prefixes match few keys.
+            return self.scan(prefix, kind, limit)
+        top = self.tops.get((prefix, kind))
+        if top is None:
+            top = self.tops[(prefix, kind)] = self.scan(
+                prefix, kind, AUTOCOMPLETE_MAX_LIMIT
+            )
+        return top[:limit]
+
+
+class PrefixIndex:
+    """Индекс названий в памяти процесса для автодополнения.
+
+    Лучшие k выбираются по весу: рейтингу для произведений и числу
+    произведений для жанров и категорий. Индекс строится при первом
+    запросе, свои записи процесс вносит сигналами. При записях других
+    процессов (видны по версиям моделей в кэше API) новый индекс строит
+    заметивший их запрос, а не реже раза в LOCAL_INDEX_MAX_AGE секунд —
+    фоновый поток. Остальные запросы тем временем ищут по прежнему
+    индексу, который затем подменяется.
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.build_lock = threading.Lock()
+        self.state = None
+        self.snapshot = None
+        # Thread rebuilding an index older than LOCAL_INDEX_MAX_AGE.
+        self.builder = None
+        # Writes applied while a new index is built, replayed onto it.
+        self.journal = None
+        self.dirty_titles = set()
+        self.counts_dirty = False
+
+    @property
+    def loaded(self):
+        return self.state is not None
+
+    def apply(self, ref, item):
+        if self.journal is not None:
+            self.journal.append((ref, item))
+        self.state.replace(ref, item)
+
+    def upsert(self, ref, item):
+        with self.lock:
+            if not self.loaded:
+                return
+            old = self.state.items.get(ref)
+            if old is not None and 'weight' not in item:
+                item['weight'] = old['weight']
+            self.apply(ref, {'weight': 0, **item})
+
+    def discard(self, ref):
+        with self.lock:
+            if self.loaded:
+                self.apply(ref, None)
+
+    def mark_title_dirty(self, title_id):
+        with self.lock:
+            if self.loaded:
+                self.dirty_titles.add(title_id)
+
+    def mark_counts_dirty(self):
+        with self.lock:
+            if self.loaded:
+                self.counts_dirty = True
+
+    def rebuild(self, snapshot):
+        with self.lock:
+            self.journal = []
+        try:
+            items = {}
+            for title in Title.objects.values('id', 'name', 'rating'):
+                items[('title', title['id'])] = {
+                    'name': title['name'], 'weight': title['rating'] or 0,
+                }
+            for model in (Category, Genre):
+                for row in self.count_titles(model).values(
+                    'id', 'name', 'slug', 'titles_count'
+                ):
+                    items[(KINDS[model], row['id'])] = {
+                        'name': row['name'], 'slug': row['slug'],
+                        'weight': row['titles_count'],
+                    }
+            state = IndexState(items)
+            with self.lock:
+                for ref, item in self.journal:
+                    state.replace(ref, item)
+                self.state = state
+                self.snapshot = snapshot
+        finally:
+            with self.lock:
+                self.journal = None
+
+    @staticmethod
+    def count_titles(model):
+        return model.objects.order_by().annotate(titles_count=Count('titles'))
+
+    def refresh_weights(self):
+        with self.lock:
+            dirty_titles, self.dirty_titles = self.dirty_titles, set()
+            counts_dirty, self.counts_dirty = self.counts_dirty, False
+        weights = []
+        if dirty_titles:
+            weights.extend(
+                (('title', pk), rating or 0)
+                for pk, rating in Title.objects.filter(
+                    pk__in=dirty_titles
+                ).values_list('id', 'rating')
+            )
+        if counts_dirty:
+            for model in (Category, Genre):
+                weights.extend(
+                    ((KINDS[model], pk), count)
+                    for pk, count in self.count_titles(model).values_list(
+                        'id', 'titles_count'
+                    )
+                )
+        if weights:
+            with self.lock:
+                for ref, weight in weights:
+                    self.state.set_weight(ref, weight)
+
+    def ensure_fresh(self):
+        # Versions are read before loading rows, so a write racing with
+        # the rebuild leaves the index stale and it is rebuilt again.
+        snapshot = get_local_snapshot(INDEXED_MODELS)
+        if not self.loaded:
+            with self.build_lock:
+                if not self.loaded:
+                    self.rebuild(snapshot)
+        elif has_foreign_writes(self.snapshot, snapshot):
+            # This request waits for the writes it can see; the others
+            # keep using the current index until the new one is swapped.
+            if self.build_lock.acquire(blocking=False):
+                try:
+                    self.rebuild(snapshot)
+                finally:
+                    self.build_lock.release()
+        elif (is_snapshot_expired(self.snapshot, snapshot)
+              and self.build_lock.acquire(blocking=False)):
+            self.builder = threading.Thread(
+                target=self.rebuild_in_background, args=(snapshot,),
+                daemon=True
+            )
+            self.builder.start()
+        self.refresh_weights()
+
+    def rebuild_in_background(self, snapshot):
+        try:
+            self.rebuild(snapshot)
+        finally:
+            connection.close()
+            self.build_lock.release()
+
+    def search(self, prefix, limit, kind=None):
+        prefix = ' '.join(WORD_RE.findall(prefix.casefold()))
+        if not prefix:
+            return []
+        self.ensure_fresh()
+        with self.lock:
+            return [self.represent(rank[2:])
+                    for rank in self.state.search(prefix, limit, kind)]
+
+    def represent(self, ref):
+        kind, pk = ref
+        item = self.state.items[ref]
+        data = {'type': kind, 'name': item['name']}
+        if kind == 'title':
+            data['id'] = pk
+        else:
+            data['slug'] = item['slug']
+        return data
+
+
+autocomplete_index = PrefixIndex()
+
+
+def index_instance(instance):
+    ref = (KINDS[type(instance)], instance.pk)
+    item = {'name': instance.name}
+    if isinstance(instance, Title):
+        item['weight'] = instance.rating or 0
+    else:
+        item['slug'] = instance.slug
+    autocomplete_index.upsert(ref, item)
+
+
+def unindex_instance(model, pk):
+    autocomplete_index.discard((KINDS[model], pk))
@@ -0,0 +1,221 @@
+import hashlib
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'api_version:{label}'
+RESPONSE_KEY = 'api_response:{versions}:{url}'
+
+# Bumps made by this process: per-process indexes use them to tell their
+# own, already applied, writes from writes of other workers.
+local_bumps = Counter()
+
+
+def get_api_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def new_version():
+    # A timestamp never repeats a version evicted from the cache.
+    return time.time_ns()
+
+
+def get_versions(labels):
+    cache = get_api_cache()
+    keys = [VERSION_KEY.format(label=label) for label in labels]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(labels):
+    cache = get_api_cache()
+    for label in labels:
+        key = VERSION_KEY.format(label=label)
+        try:
+            cache.incr(key)
+            # File and database backends re-set an incremented key with
+            # the default timeout.
+            cache.touch(key, timeout=None)
+        except ValueError:
+            cache.set(key, new_version(), timeout=None)
+        local_bumps[label] += 1
+
+
+def get_model_versions(models):
+    return get_versions(model._meta.label_lower for model in models)
+
+
+def bump_model_versions(*models):
+    bump_versions(model._meta.label_lower for model in models)
+
+
+def get_local_snapshot(models):
+    """Версии моделей, число их сдвигов этим процессом и время снимка."""
+    labels = [model._meta.label_lower for model in models]
+    return (get_versions(labels), [local_bumps[label] for label in labels],
+            time.monotonic())
+
+
+def has_foreign_writes(built, current):
+    """Записали ли модели другие процессы после снимка `built`.
+
+    Записи других процессов видны по версиям, только если кэш общий.
+    """
+    (built_versions, built_bumps, _), (versions, bumps, _) = built, current
+    return any(
+        version != built_version + bumps_now - bumps_then
+        for version, built_version, bumps_now, bumps_then
+        in zip(versions, built_versions, bumps, built_bumps)
+    )
+
+
+def is_snapshot_expired(built, current):
+    return current[2] - built[2] > settings.LOCAL_INDEX_MAX_AGE
+
+
+def is_snapshot_stale(built, current):
+    """Нужно ли перестроить индекс, построенный по снимку `built`.
+
+    Записи, которые не видны по версиям, замечает ограничение возраста
+    LOCAL_INDEX_MAX_AGE.
+    """
+    return (built is None or is_snapshot_expired(built, current)
+            or has_foreign_writes(built, current))
+
+
+def get_object_label(model, pk):
+    return f'{model._meta.label_lower}:{pk}'
+
+
+def bump_on_commit(*models):
+    transaction.on_commit(lambda: bump_model_versions(*models))
+
+
+class VersionedCacheMixin:
+    """Кэширует ответы GET по полному URL и версиям моделей.
+
+    Запись в любую из `cache_models` меняет её версию, поэтому
+    старые ответы перестают находиться без обхода ключей.
+    """
+    cache_models = ()
+
+    def get_cache_key(self, request):
+        versions = '.'.join(map(str, get_model_versions(self.cache_models)))
+        url = hashlib.md5(
+            request.build_absolute_uri().encode()
+        ).hexdigest()
+        return RESPONSE_KEY.format(versions=versions, url=url)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_api_cache()
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data, status=status.HTTP_200_OK)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class VersionedCacheRetrieveMixin(VersionedCacheMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request,
+                                    *args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """Отвечает 304 на If-None-Match/If-Modified-Since.
+
+    Валидаторы берутся из дешёвого запроса max(updated_at)/count,
+    поэтому при совпадении основной запрос и сериализация
+    не выполняются.
+    """
+    modified_field = 'updated_at'
+
+    def get_list_state(self):
+        return self.filter_queryset(self.get_queryset()).order_by(
+        ).aggregate(
+            last_modified=Max(self.modified_field), count=Count('pk')
+        )
+
+    def get_detail_state(self):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        try:
+            last_modified = self.get_queryset().filter(
+                **{self.lookup_field: self.kwargs[lookup]}
+            ).values_list(self.modified_field, flat=True).first()
+        except (TypeError, ValueError, ValidationError):
+            # A malformed lookup value can't match, as in
+            # rest_framework.generics.get_object_or_404.
+            raise Http404
+        return {'last_modified': last_modified, 'count': 1}
+
+    def load_state(self, request, compute):
+        # Responses cached by model version share their validators, so
+        # a cached GET answers 304 or 200 without touching the database.
+        if not isinstance(self, VersionedCacheMixin):
+            return compute()
+        cache = get_api_cache()
+        key = f'{self.get_cache_key(request)}:state'
+        state = cache.get(key)
+        if state is None:
+            state = compute()
+            cache.set(key, state, settings.API_CACHE_TIMEOUT)
+        return state
+
+    def conditional_response(self, handler, state, request, *args,
+                             with_last_modified=True, **kwargs):
+        last_modified = state['last_modified']
+        if last_modified is None:
+            return handler(request, *args, **kwargs)
+        etag = quote_etag(hashlib.sha1('|'.join((
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+            last_modified.isoformat(),
+            str(state['count']),
+        )).encode()).hexdigest())
+        timestamp = (int(last_modified.timestamp()) if with_last_modified
+                     else None)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        # max(updated_at) stays the same when a row is deleted, so lists
+        # are validated only by the ETag, which also covers the count.
+        return self.conditional_response(
+            super().list, self.load_state(request, self.get_list_state),
+            request, *args, with_last_modified=False, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, self.load_state(request, self.get_detail_state),
+            request, *args, **kwargs
+        )
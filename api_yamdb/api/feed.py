@@ -0,0 +1,161 @@
+from django.conf import settings
+from django.db.models import (Case, F, IntegerField, OuterRef, Q, Subquery,
+                              Sum, Value, When)
+from django.db.models.functions import Coalesce
+
+from api.cache import get_api_cache, get_model_versions
+from reviews.models import GenreTitle, Review, Title
+
+AFFINITY_KEY = 'feed_affinity:{user_id}'
+
+
+def get_liked_rows(user_id, title_ids=None):
+    # One row per (liked title, genre): the title's category and genres
+    # come in the same query.
+    reviews = Review.objects.filter(
+        author_id=user_id, score__gte=settings.FEED_MIN_SCORE
+    )
+    if title_ids is not None:
+        reviews = reviews.filter(title_id__in=title_ids)
+    return reviews.values_list('title_id', 'score', 'title__category_id',
+                               'title__genre')
+
+
+def collect_titles(rows):
+    titles = {}
+    for title_id, score, category_id, genre_id in rows:
+        _, _, genre_ids = titles.setdefault(
+            title_id, (score, category_id, [])
+        )
+        if genre_id is not None:
+            genre_ids.append(genre_id)
+    return titles
+
+
+def weigh(weights, pk, delta):
+    weight = weights.get(pk, 0) + delta
+    if weight > 0:
+        weights[pk] = weight
+    else:
+        weights.pop(pk, None)
+
+
+def apply_title(vector, entry, sign):
+    score, category_id, genre_ids = entry
+    if category_id is not None:
+        weigh(vector['categories'], category_id, sign * score)
+    for genre_id in genre_ids:
+        weigh(vector['genres'], genre_id, sign * score)
+
+
+def build_affinity(user_id):
+    """Вектор интересов: сумма высоких оценок по жанрам и категориям.
+
+    Вклад каждого понравившегося произведения хранится рядом, поэтому
+    изменённый отзыв пересчитывается без повторного обхода истории.
+    """
+    vector = {'titles': {}, 'genres': {}, 'categories': {},
+              'pending': set(), 'ranking': [], 'ranking_version': None}
+    for title_id, entry in collect_titles(get_liked_rows(user_id)).items():
+        vector['titles'][title_id] = entry
+        apply_title(vector, entry, 1)
+    return vector
+
+
+def refresh_titles(vector, user_id):
+    pending, vector['pending'] = vector['pending'], set()
+    for title_id in pending:
+        entry = vector['titles'].pop(title_id, None)
+        if entry is not None:
+            apply_title(vector, entry, -1)
+    for title_id, entry in collect_titles(
+            get_liked_rows(user_id, pending)).items():
+        vector['titles'][title_id] = entry
+        apply_title(vector, entry, 1)
+
+
+def get_ranking(user_id):
+    """Лента пользователя: [(id произведения, близость)] из кэша.
+
+    Лента хранится рядом с вектором интересов и пересчитывается, только
+    когда меняется вектор или версия произведений в кэше API.
+    """
+    cache = get_api_cache()
+    key = AFFINITY_KEY.format(user_id=user_id)
+    vector = cache.get(key)
+    [version] = get_model_versions([Title])
+    if vector is None:
+        vector = build_affinity(user_id)
+    elif vector['pending']:
+        refresh_titles(vector, user_id)
+    elif vector.get('ranking_version') == version:
+        return vector['ranking']
+    vector['ranking'] = list(get_feed(user_id, vector).values_list(
+        'id', 'affinity'
+    )[:settings.FEED_SIZE])
+    vector['ranking_version'] = version
+    cache.set(key, vector, settings.FEED_AFFINITY_TIMEOUT)
+    return vector['ranking']
+
+
+def mark_review_changed(user_id, title_id):
+    # Only a vector that is already cached is updated: a missing one is
+    # built from the whole history on the next feed request anyway.
+    cache = get_api_cache()
+    key = AFFINITY_KEY.format(user_id=user_id)
+    vector = cache.get(key)
+    if vector is None:
+        return
+    vector['pending'].add(title_id)
+    cache.set(key, vector, settings.FEED_AFFINITY_TIMEOUT)
+
+
+def weight_cases(field, weights):
+    return [When(**{field: pk}, then=Value(weight))
+            for pk, weight in weights.items()]
+
+
+def top_weights(weights):
+    return dict(sorted(weights.items(), key=lambda item: -item[1])[
+        :settings.FEED_TOP_TASTES
+    ])
+
+
+def get_feed(user_id, vector):
+    """Непрочитанные произведения любимых жанров и категорий.
+
+    Кандидаты выбираются по индексам связей жанров и категорий
+    произведений из FEED_TOP_TASTES самых весомых. Близость
+    произведения — сумма весов его категории и жанров; при равной
+    близости выше произведения с большим взвешенным рейтингом.
+    """
+    categories = top_weights(vector['categories'])
+    genres = top_weights(vector['genres'])
+    if not categories and not genres:
+        return Title.objects.none().annotate(affinity=Value(0))
+    affinity = Value(0)
+    if categories:
+        affinity = Case(*weight_cases('category_id', categories),
+                        default=Value(0))
+    if genres:
+        genre_affinity = GenreTitle.objects.filter(
+            title_id=OuterRef('pk'), genre_id__in=list(genres)
+        ).order_by().values('title_id').annotate(
+            total=Sum(Case(*weight_cases('genre_id', genres),
+                           output_field=IntegerField()))
+        ).values('total')
+        affinity = affinity + Coalesce(
+            Subquery(genre_affinity, output_field=IntegerField()), 0
+        )
+    return Title.objects.filter(
+        Q(category_id__in=list(categories))
+        | Q(pk__in=GenreTitle.objects.filter(
+            genre_id__in=list(genres)
+        ).values('title_id'))
+    ).exclude(
+        reviews__author_id=user_id
+    ).annotate(
+        affinity=Coalesce(affinity, 0, output_field=IntegerField())
+    ).order_by(
+        '-affinity', F('weighted_rating').desc(nulls_last=True), 'id'
+    )
@@ -1,6 +1,20 @@
 import django_filters
 
-from reviews.models import Title
+from api.genre_bitmaps import filter_by_genres
+from api.pagination import order_nulls_first
+from reviews.models import Genre, Title
+from reviews.search import search_titles
+
+ORDERING_FIELDS = ('rating', 'year', 'name')
+ORDERING_CHOICES = tuple(f'{sign}{field}' for field in ORDERING_FIELDS
+                         for sign in ('', '-'))
+
+
+def get_ordering_key(value):
+    # id breaks ties in the same direction, so (rating, id) and
+    # (name, id) indexes are walked forwards or backwards.
+    sign = '-' if value.startswith('-') else ''
+    return (value, f'{sign}id')
 
 
 class TitleFilter(django_filters.FilterSet):
@@ -8,15 +22,62 @@ class TitleFilter(django_filters.FilterSet):
         field_name='name',
         lookup_expr='icontains'
     )
-    genre = django_filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='iexact'
-    )
+    search = django_filters.CharFilter(method='filter_search')
+    genre = django_filters.CharFilter(method='filter_genre')
+    genre_all = django_filters.CharFilter(method='filter_genre_sets')
+    genre_any = django_filters.CharFilter(method='filter_genre_sets')
+    genre_not = django_filters.CharFilter(method='filter_genre_sets')
     category = django_filters.CharFilter(
         field_name='category__slug',
         lookup_expr='iexact'
     )
+    rating_min = django_filters.NumberFilter(
+        field_name='rating',
+        lookup_expr='gte'
+    )
+    rating_max = django_filters.NumberFilter(
+        field_name='rating',
+        lookup_expr='lte'
+    )
+    ordering = django_filters.ChoiceFilter(
+        choices=[(value, value) for value in ORDERING_CHOICES],
+        method='filter_ordering'
+    )
+
+    def filter_genre(self, queryset, name, value):
+        # A subquery on genre ids lets the planner walk the GenreTitle
+        # index instead of scanning the join with a case-insensitive LIKE.
+        return queryset.filter(
+            genre__in=Genre.objects.filter(slug__iexact=value).values('id')
+        )
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+    def filter_ordering(self, queryset, name, value):
+        # Same NULL placement as the keyset built by the viewset.
+        return queryset.order_by(
+            *order_nulls_first(Title, get_ordering_key(value))
+        )
+
+    def filter_genre_sets(self, queryset, name, value):
+        # All three are combined into one bitmap in filter_queryset.
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return filter_by_genres(queryset, *(
+            self.split_slugs(self.form.cleaned_data.get(name))
+            for name in ('genre_all', 'genre_any', 'genre_not')
+        ))
+
+    @staticmethod
+    def split_slugs(value):
+        return [slug.strip() for slug in (value or '').split(',')
+                if slug.strip()]
 
     class Meta:
         model = Title
-        fields = ('year', 'name', 'category', 'genre',)
+        fields = ('year', 'name', 'category', 'genre', 'genre_all',
+                  'genre_any', 'genre_not', 'search', 'rating_min',
+                  'rating_max', 'ordering',)
@@ -0,0 +1,146 @@
+import json
+import threading
+from functools import reduce
+from operator import and_, or_
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from api.cache import get_local_snapshot, is_snapshot_stale
+from reviews.models import Genre, GenreTitle, Title
+
+INDEXED_MODELS = (Genre, Title)
+
+
+def iter_bits(bitmap):
+    """Номера установленных битов по возрастанию."""
+    bits = bin(bitmap)[:1:-1]
+    position = bits.find('1')
+    while position != -1:
+        yield position
+        position = bits.find('1', position + 1)
+
+
+class GenreBitmapIndex:
+    """Битовые карты произведений по жанрам в памяти процесса.
+
+    Бит с номером id произведения установлен в карте жанра, если
+    произведение к нему относится. Карты — целые числа Python, поэтому
+    AND/OR/NOT по нескольким жанрам сводятся к побитовым операциям
+    вместо соединений с GenreTitle. Свежесть проверяется так же, как
+    у индекса автодополнения.
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.bitmaps = {}
+        self.genre_ids = {}
+        self.snapshot = None
+
+    @property
+    def loaded(self):
+        return self.snapshot is not None
+
+    def rebuild(self, snapshot):
+        bitmaps = {}
+        for genre_id, title_id in GenreTitle.objects.order_by().values_list(
+            'genre_id_id', 'title_id_id'
+        ):
+            bitmaps[genre_id] = bitmaps.get(genre_id, 0) | 1 << title_id
+        self.bitmaps = bitmaps
+        self.genre_ids = {
+            slug.casefold(): pk
+            for pk, slug in Genre.objects.values_list('id', 'slug')
+        }
+        self.snapshot = snapshot
+
+    def ensure_fresh(self):
+        snapshot = get_local_snapshot(INDEXED_MODELS)
+        if is_snapshot_stale(self.snapshot, snapshot):
+            self.rebuild(snapshot)
+
+    def update(self, method):
+        with self.lock:
+            if self.loaded:
+                method()
+
+    def set_membership(self, genre_ids, title_ids, member):
+        def apply():
+            mask = reduce(or_, (1 << pk for pk in title_ids), 0)
+            for genre_id in genre_ids:
+                bitmap = self.bitmaps.get(genre_id, 0)
+                self.bitmaps[genre_id] = (bitmap | mask if member
+                                          else bitmap & ~mask)
+        self.update(apply)
+
+    def clear_title(self, title_id):
+        self.set_membership(list(self.bitmaps), [title_id], False)
+
+    def clear_genre(self, genre_id):
+        self.update(lambda: self.bitmaps.pop(genre_id, None))
+
+    def invalidate(self):
+        with self.lock:
+            self.snapshot = None
+
+    def set_genre(self, genre_id, slug):
+        def apply():
+            for key, pk in list(self.genre_ids.items()):
+                if pk == genre_id:
+                    del self.genre_ids[key]
+            self.genre_ids[slug.casefold()] = genre_id
+        self.update(apply)
+
+    def remove_genre(self, genre_id):
+        def apply():
+            self.bitmaps.pop(genre_id, None)
+            self.genre_ids = {key: pk for key, pk in self.genre_ids.items()
+                              if pk != genre_id}
+        self.update(apply)
+
+    def get_bitmaps(self, slugs):
+        return [self.bitmaps.get(self.genre_ids.get(slug.casefold()), 0)
+                for slug in slugs]
+
+    def select(self, all_slugs=(), any_slugs=(), not_slugs=()):
+        """Возвращает (битовая карта, исключать ли её из выборки).
+
+        Без условий "все" и "любой" отрицание нельзя вычислить как
+        дополнение, поэтому отдаётся карта исключаемых произведений.
+        """
+        with self.lock:
+            self.ensure_fresh()
+            excluded = reduce(or_, self.get_bitmaps(not_slugs), 0)
+            if not all_slugs and not any_slugs:
+                return excluded, True
+            included = []
+            if all_slugs:
+                included.append(reduce(and_, self.get_bitmaps(all_slugs)))
+            if any_slugs:
+                included.append(reduce(or_, self.get_bitmaps(any_slugs)))
+            return reduce(and_, included) & ~excluded, False
+
+
+genre_bitmaps = GenreBitmapIndex()
+
+
+def filter_by_bitmap(queryset, bitmap, exclude=False):
+    ids = list(iter_bits(bitmap))
+    if connection.vendor == 'sqlite':
+        # One JSON parameter instead of an IN list that can overflow
+        # the SQLite variable limit.
+        lookup = {'id__in': RawSQL('SELECT value FROM json_each(%s)',
+                                   (json.dumps(ids),))}
+    else:
+        lookup = {'id__in': ids}
+    if exclude:
+        return queryset.exclude(**lookup)
+    return queryset.filter(**lookup)
+
+
+def filter_by_genres(queryset, all_slugs=(), any_slugs=(), not_slugs=()):
+    if not (all_slugs or any_slugs or not_slugs):
+        return queryset
+    bitmap, exclude = genre_bitmaps.select(all_slugs, any_slugs, not_slugs)
+    if exclude and not bitmap:
+        return queryset
+    return filter_by_bitmap(queryset, bitmap, exclude)
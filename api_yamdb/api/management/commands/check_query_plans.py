@@ -0,0 +1,120 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.http import Http404
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.feed import get_feed
+from api.pagination import get_keyset_ordering, order_nulls_first
+from api.views import (CategoryViewSet, CommentsViewSet, GenreViewSet,
+                       LeaderboardView, ReviewViewSet, TitleViewSet,
+                       UsersViewSet)
+from reviews.models import Category, Genre, LeaderboardEntry, Review
+
+FULL_SCAN = 'SCAN '
+INDEX_SCAN_MARKERS = (' USING INDEX ', ' USING COVERING INDEX ',
+                      ' USING INTEGER PRIMARY KEY ', ' VIRTUAL TABLE INDEX ')
+TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+def build_querysets():
+    """Собирает запросы так же, как их строят вьюсеты API."""
+    review = Review.objects.order_by('pk').first()
+    category = Category.objects.order_by('pk').first()
+    genre = Genre.objects.order_by('pk').first()
+    title_kwargs = {'title_id': review.title_id if review else 0}
+    comment_kwargs = {**title_kwargs, 'review_id': review.pk if review else 0}
+    title_params = [
+        {},
+        {'year': 2000},
+        {'category': category.slug if category else 'slug'},
+        {'genre': genre.slug if genre else 'slug'},
+        {'name': 'a'},
+        {'search': 'a'},
+        {'genre_any': genre.slug if genre else 'slug'},
+        {'genre_not': genre.slug if genre else 'slug'},
+        {'rating_min': 8, 'ordering': '-rating'},
+        {'rating_min': 2, 'rating_max': 5},
+        {'ordering': 'name'},
+    ]
+    cases = [
+        (CategoryViewSet, {}, [{}, {'search': 'a'}]),
+        (GenreViewSet, {}, [{}, {'search': 'a'}]),
+        (UsersViewSet, {}, [{}, {'search': 'a'}]),
+        (TitleViewSet, {}, title_params),
+        (ReviewViewSet, title_kwargs, [{}]),
+        (CommentsViewSet, comment_kwargs, [{}]),
+    ]
+    factory = APIRequestFactory()
+    for viewset, kwargs, params_list in cases:
+        for params in params_list:
+            view = viewset(action='list', kwargs=kwargs, format_kwarg=None)
+            view.request = Request(factory.get('/', params))
+            try:
+                queryset = view.filter_queryset(view.get_queryset())
+            except Http404:
+                continue
+            label = f'{viewset.__name__} {params or ""}'.strip()
+            yield label, queryset
+            keyset_ordering = get_keyset_ordering(view)
+            if keyset_ordering:
+                yield (f'{label} keyset', queryset.order_by(
+                    *order_nulls_first(queryset.model, keyset_ordering)
+                ))
+            if viewset is TitleViewSet:
+                for facet, facet_queryset in view.get_facet_querysets(
+                        queryset).items():
+                    yield f'{label} facets {facet}', facet_queryset
+    yield from build_extra_querysets(review, category, genre)
+
+
+def build_extra_querysets(review, category, genre):
+    """Запросы лент, топов и похожих произведений вне list-вьюсетов."""
+    category_slug = category.slug if category else 'slug'
+    genre_slug = genre.slug if genre else 'slug'
+    for kind, slug in ((LeaderboardEntry.ALL, ''),
+                       (LeaderboardEntry.CATEGORY, category_slug),
+                       (LeaderboardEntry.GENRE, genre_slug)):
+        yield (f'LeaderboardView {kind} {slug}'.strip(),
+               LeaderboardView.get_titles(kind, slug))
+    yield 'TitleViewSet similar', TitleViewSet.get_similar_titles(
+        review.title_id if review else 0
+    )
+    vector = {'categories': {category.pk if category else 0: 1},
+              'genres': {genre.pk if genre else 0: 1}}
+    yield 'UsersViewSet feed', get_feed(
+        review.author_id if review else 0, vector
+    )
+
+
+def plan_detail(line):
+    # SQLite backend prefixes every row with "id parent notused".
+    return line.split(maxsplit=3)[-1] if line[:1].isdigit() else line
+
+
+def is_bad_plan(plan):
+    full_scan = any(
+        detail.startswith(FULL_SCAN)
+        and not any(marker in detail for marker in INDEX_SCAN_MARKERS)
+        for detail in map(plan_detail, plan.splitlines())
+    )
+    return full_scan and TEMP_SORT in plan
+
+
+class Command(BaseCommand):
+    help = ('run EXPLAIN QUERY PLAN on API querysets and fail on '
+            'full scans with temp B-tree sorts')
+
+    def handle(self, *args, **options):
+        failed = []
+        for label, queryset in build_querysets():
+            plan = queryset.explain()
+            if is_bad_plan(plan):
+                failed.append(label)
+                self.stdout.write(self.style.ERROR(f'{label}:\n{plan}'))
+            elif options['verbosity'] > 1:
+                self.stdout.write(f'{label}:\n{plan}')
+        if failed:
+            raise CommandError(
+                f'Full table scan with temp sort in: {", ".join(failed)}'
+            )
+        self.stdout.write(self.style.SUCCESS('All query plans use indexes'))
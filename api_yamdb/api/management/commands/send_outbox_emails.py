@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.utils import deliver_outbox_emails
+
+
+class Command(BaseCommand):
+    help = 'send queued emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='emails sent over one connection'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='keep draining the outbox until interrupted'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='seconds to wait when the outbox is empty'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = deliver_outbox_emails(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}')
+                continue
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,85 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+_stats_lock = threading.Lock()
+_route_stats: dict[str, dict[str, float]] = {}
+
+
+class QueryCollector:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def record_route_stats(route, queries, db_time):
+    with _stats_lock:
+        stats = _route_stats.setdefault(route, {
+            'requests': 0, 'queries': 0, 'max_queries': 0, 'db_time_ms': 0.0,
+        })
+        stats['requests'] += 1
+        stats['queries'] += queries
+        stats['max_queries'] = max(stats['max_queries'], queries)
+        stats['db_time_ms'] += db_time * 1000
+
+
+def get_route_stats():
+    with _stats_lock:
+        return {route: dict(stats) for route, stats in _route_stats.items()}
+
+
+def reset_route_stats():
+    with _stats_lock:
+        _route_stats.clear()
+
+
+class QueryStatsMiddleware:
+    """Считает SQL-запросы и время БД для доли запросов.
+
+    Доля задаётся настройкой QUERY_STATS_SAMPLE_RATE (0 отключает сбор).
+    Статистика копится по маршрутам; заголовок Server-Timing получают
+    только администраторы и режим DEBUG.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    @staticmethod
+    def shows_timing(request):
+        if settings.DEBUG:
+            return True
+        # DRF copies the user it authenticated onto the Django request.
+        user = getattr(request, 'user', None)
+        return bool(user is not None and user.is_authenticated
+                    and user.is_admin)
+
+    def __call__(self, request):
+        sample_rate = settings.QUERY_STATS_SAMPLE_RATE
+        if sample_rate <= 0 or (sample_rate < 1
+                                and random.random() >= sample_rate):
+            return self.get_response(request)
+
+        collector = QueryCollector()
+        with connection.execute_wrapper(collector):
+            response = self.get_response(request)
+
+        if self.shows_timing(request):
+            response['Server-Timing'] = (
+                f'db;dur={collector.duration * 1000:.2f};'
+                f'desc="{collector.count} queries"'
+            )
+        match = request.resolver_match
+        if match is not None:
+            record_route_stats(f'{request.method} {match.route}',
+                               collector.count, collector.duration)
+        return response
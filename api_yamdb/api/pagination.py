@@ -0,0 +1,188 @@
+import base64
+import json
+import math
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def get_keyset_ordering(view):
+    """Ключ курсора вьюсета: `get_keyset_ordering()` или атрибут."""
+    if hasattr(view, 'get_keyset_ordering'):
+        return view.get_keyset_ordering()
+    return getattr(view, 'keyset_ordering', None)
+
+
+def order_nulls_first(model, ordering):
+    """ORDER BY, в котором NULL меньше любого значения на всех базах.
+
+    Так сортирует SQLite, и на этом порядке строится условие курсора.
+    """
+    expressions = []
+    for field in ordering:
+        name = field.lstrip('-')
+        if not model._meta.get_field(name).null:
+            expressions.append(field)
+        elif field.startswith('-'):
+            expressions.append(F(name).desc(nulls_last=True))
+        else:
+            expressions.append(F(name).asc(nulls_first=True))
+    return expressions
+
+
+class KeysetPagination:
+    """Курсорная пагинация по составному ключу сортировки.
+
+    Страница выбирается условием WHERE по значениям ключа последней
+    отданной строки, поэтому ни COUNT(*), ни OFFSET не выполняются.
+    Порядок берётся из `keyset_ordering` вьюсета и должен заканчиваться
+    уникальным полем; NULL в ключе считается меньше любого значения.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, page_size):
+        self.page_size = page_size
+
+    @staticmethod
+    def split_ordering(ordering):
+        return [(field.lstrip('-'), field.startswith('-'))
+                for field in ordering]
+
+    @staticmethod
+    def encode_value(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return value
+
+    def encode_cursor(self, values, reverse):
+        payload = json.dumps({'v': values, 'r': reverse},
+                             separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor, model_fields):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            values, reverse = payload['v'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if (not isinstance(values, list) or len(values) != len(model_fields)
+                or not all(isinstance(value, (str, int, float))
+                           or value is None and field.null
+                           for field, value in zip(model_fields, values))):
+            raise NotFound(self.invalid_cursor_message)
+        # Values are compared with the key columns, so each one must be
+        # a valid value of its field that the database can bind.
+        try:
+            values = [field.to_python(value)
+                      for field, value in zip(model_fields, values)]
+        except (ValidationError, OverflowError):
+            raise NotFound(self.invalid_cursor_message)
+        if not all(map(self.is_bindable, values)):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    @staticmethod
+    def is_bindable(value):
+        if isinstance(value, float):
+            return math.isfinite(value)
+        if isinstance(value, int):
+            return abs(value) <= models.BigIntegerField.MAX_BIGINT
+        return True
+
+    @staticmethod
+    def build_filter(fields, values, reverse):
+        """Строит лексикографическое условие "строго после ключа"."""
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(fields, values):
+            downwards = descending != reverse
+            if value is None:
+                # Nothing is below NULL; every value is above it.
+                if not downwards:
+                    condition |= equal & Q(**{f'{name}__isnull': False})
+                equal &= Q(**{f'{name}__isnull': True})
+                continue
+            after = Q(**{f'{name}__{"lt" if downwards else "gt"}': value})
+            if downwards:
+                after |= Q(**{f'{name}__isnull': True})
+            condition |= equal & after
+            equal &= Q(**{name: value})
+        return condition
+
+    def row_key(self, row, fields):
+        return [self.encode_value(getattr(row, name)) for name, _ in fields]
+
+    def paginate_queryset(self, queryset, request, view):
+        self.request = request
+        fields = self.split_ordering(get_keyset_ordering(view))
+        model = queryset.model
+        cursor = request.query_params.get(self.cursor_query_param)
+        values, reverse = None, False
+        if cursor:
+            values, reverse = self.decode_cursor(cursor, [
+                model._meta.get_field(name) for name, _ in fields
+            ])
+            queryset = queryset.filter(
+                self.build_filter(fields, values, reverse)
+            )
+        queryset = queryset.order_by(*order_nulls_first(model, [
+            ('-' if descending != reverse else '') + name
+            for name, descending in fields
+        ]))
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_key = self.previous_key = None
+        if rows and (has_more if not reverse else values is not None):
+            self.next_key = self.row_key(rows[-1], fields)
+        if rows and (values is not None if not reverse else has_more):
+            self.previous_key = self.row_key(rows[0], fields)
+        return rows
+
+    def get_link(self, key, reverse):
+        if key is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param,
+                                   self.encode_cursor(key, reverse))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_link(self.next_key, False),
+            'previous': self.get_link(self.previous_key, True),
+            'results': data,
+        })
+
+
+class KeysetOptInPagination(PageNumberPagination):
+    """Постраничная пагинация с включаемым курсорным режимом.
+
+    Клиенты, не передающие `cursor`, получают прежний ответ с `count`;
+    запрос с `?cursor=` (в том числе пустым) переключает вьюсет на
+    KeysetPagination.
+    """
+    def paginate_queryset(self, queryset, request, view=None):
+        if (view is not None
+                and get_keyset_ordering(view)
+                and KeysetPagination.cursor_query_param
+                in request.query_params):
+            self.keyset = KeysetPagination(self.get_page_size(request)
+                                           or self.page_size)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,9 +1,15 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.db import IntegrityError
+from django.db.models import Q
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
 from api.validators import validator_for_username
-from reviews.constants import USERNAME_FIELD_MAX_LENGTH
+from reviews.constants import (AUTOCOMPLETE_DEFAULT_LIMIT,
+                               AUTOCOMPLETE_MAX_LIMIT, AUTOCOMPLETE_TYPES,
+                               NAME_FIELD_MAX_LENGTH,
+                               USERNAME_FIELD_MAX_LENGTH)
 from reviews.models import Category, Comment, Genre, Review, Title
 
 User = get_user_model()
@@ -39,27 +45,38 @@ class UserSignUpSerializer(serializers.ModelSerializer):
     def validate(self, data):
         username = data.get('username')
         email = data.get('email')
-        if User.objects.filter(email=email,
-                               username=username).exists():
-            return data
-        if User.objects.filter(email=email).exists():
+        # One lookup over both unique indexes covers every case below.
+        self.existing_user = None
+        users = list(User.objects.filter(
+            Q(email=email) | Q(username=username)
+        ).order_by()[:2])
+        for user in users:
+            if user.email == email and user.username == username:
+                self.existing_user = user
+                return data
+        if any(user.email == email for user in users):
             raise serializers.ValidationError(
                 {'email': 'Email already registered'}
             )
-        if User.objects.filter(username=username).exists():
+        if users:
             raise serializers.ValidationError(
                 {'username': 'Username already taken'}
             )
         return data
 
     def create(self, validated_data):
-        email = validated_data.get('email')
-        username = validated_data.get('username')
-        user, _ = User.objects.get_or_create(
-            email=email,
-            username=username
-        )
-        return user
+        if self.existing_user is not None:
+            return self.existing_user
+        try:
+            return User.objects.create(
+                email=validated_data.get('email'),
+                username=validated_data.get('username')
+            )
+        except IntegrityError:
+            # A concurrent signup took the email or username.
+            raise serializers.ValidationError(
+                'Email or username already registered'
+            )
 
 
 class UserGetTokenSerializer(serializers.Serializer):
@@ -71,6 +88,17 @@ class UserGetTokenSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField(required=True)
 
 
+class AutocompleteQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=NAME_FIELD_MAX_LENGTH)
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=AUTOCOMPLETE_MAX_LIMIT,
+        default=AUTOCOMPLETE_DEFAULT_LIMIT
+    )
+    type = serializers.ChoiceField(choices=AUTOCOMPLETE_TYPES,
+                                   required=False)
+
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -94,6 +122,45 @@ class TitleListSerializer(serializers.ModelSerializer):
                   'category', 'genre', 'rating')
 
 
+class FeedTitleSerializer(TitleListSerializer):
+    affinity = serializers.IntegerField(read_only=True)
+
+    class Meta(TitleListSerializer.Meta):
+        fields = (*TitleListSerializer.Meta.fields, 'affinity')
+
+
+class LeaderboardQuerySerializer(serializers.Serializer):
+    category = serializers.SlugField(required=False)
+    genre = serializers.SlugField(required=False)
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.LEADERBOARD_SIZE,
+        default=settings.LEADERBOARD_SIZE
+    )
+
+    def validate(self, data):
+        if 'category' in data and 'genre' in data:
+            raise serializers.ValidationError(
+                'Укажите либо категорию, либо жанр'
+            )
+        return data
+
+
+class LeaderboardTitleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Title
+        fields = ('id', 'name', 'year', 'rating', 'weighted_rating',
+                  'reviews_count')
+
+
+class SimilarTitleSerializer(serializers.ModelSerializer):
+    similarity = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Title
+        fields = ('id', 'name', 'year', 'rating', 'similarity')
+
+
 class TitleSerializer(serializers.ModelSerializer):
     category = serializers.SlugRelatedField(slug_field='slug',
                                             queryset=Category.objects.all())
@@ -108,8 +175,20 @@ class TitleSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'year', 'description',
                   'category', 'genre',)
 
+    def update(self, instance, validated_data):
+        genres = validated_data.pop('genre', None)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        # Rating columns are maintained by review writes with
+        # F-expressions, so they must not be overwritten from
+        # a possibly stale instance.
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        if genres is not None:
+            instance.genre.set(genres)
+        return instance
+
     def to_representation(self, instance):
-        return TitleListSerializer(instance).data
+        return TitleListSerializer(instance, context=self.context).data
 
 
 class AuthorSerializer(serializers.ModelSerializer):
@@ -128,21 +207,17 @@ class ReviewSerializer(AuthorSerializer):
             'score', 'pub_date'
         )
 
-    def validate(self, data):
-        if self.context['request'].method != 'POST':
-            return data
-
-        if Review.objects.filter(
-                author=self.context['request'].user,
-                title=get_object_or_404(
-                    Title,
-                    id=self.context['view'].kwargs.get('title_id'))
-        ).exists():
-            raise serializers.ValidationError(
-                'Можно добавить только один '
-                'отзыв на произведение'
-            )
-        return data
+    def create(self, validated_data):
+        # The unique_author_title constraint rejects a second review
+        # without a pre-check query and even for concurrent requests.
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Можно добавить только один отзыв на произведение'
+                ]
+            })
 
 
 class CommentSerializer(AuthorSerializer):
@@ -0,0 +1,231 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_init,
+                                      post_save, pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from api.autocomplete import (autocomplete_index, index_instance,
+                              unindex_instance)
+from api.cache import bump_on_commit, bump_versions, get_object_label
+from api.feed import mark_review_changed
+from api.genre_bitmaps import genre_bitmaps
+from reviews.models import Category, Genre, GenreTitle, Review, Title
+from reviews.ratings import apply_review_score
+
+User = get_user_model()
+
+# Models whose writes change cached responses of the listed models.
+CACHE_DEPENDENTS = {
+    Category: (Category, Title),
+    Genre: (Genre, Title),
+    Title: (Title,),
+    GenreTitle: (Title,),
+    Review: (Title,),
+}
+
+
+def bump_cache_version(sender, **kwargs):
+    bump_on_commit(*CACHE_DEPENDENTS[sender])
+
+
+# Connected per model: a receiver without a sender would disable fast
+# deletes (Collector.can_fast_delete) of every other model.
+for model in CACHE_DEPENDENTS:
+    post_save.connect(bump_cache_version, sender=model)
+    post_delete.connect(bump_cache_version, sender=model)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def bump_title_genres_version(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_on_commit(Title)
+
+
+@receiver(post_init, sender=Review)
+def remember_loaded_score(sender, instance, **kwargs):
+    # The title and score a save replaces; deferred ones are read in
+    # pre_save. from_db() marks the instance as saved after this signal.
+    if (instance.pk is not None and 'score' in instance.__dict__
+            and 'title_id' in instance.__dict__):
+        instance._stored_title_score = (instance.title_id, instance.score)
+
+
+@receiver(pre_save, sender=Review)
+def load_stored_score(sender, instance, raw, **kwargs):
+    if (raw or instance._state.adding
+            or hasattr(instance, '_stored_title_score')):
+        return
+    instance._stored_title_score = Review.objects.filter(
+        pk=instance.pk
+    ).values_list('title_id', 'score').first()
+
+
+@receiver(post_save, sender=Review)
+def update_title_rating(sender, instance, created, raw, **kwargs):
+    # Fixtures carry their own counters.
+    if raw:
+        return
+    if created:
+        apply_review_score(instance.title_id, added=instance.score)
+    else:
+        title_id, score = instance._stored_title_score
+        if title_id != instance.title_id:
+            # Moved to another title, e.g. in the admin.
+            apply_review_score(title_id, removed=score)
+            apply_review_score(instance.title_id, added=instance.score)
+            author_id = instance.author_id
+            transaction.on_commit(lambda: (
+                autocomplete_index.mark_title_dirty(title_id),
+                mark_review_changed(author_id, title_id),
+            ))
+        elif score != instance.score:
+            apply_review_score(instance.title_id, added=instance.score,
+                               removed=score)
+    instance._stored_title_score = (instance.title_id, instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def remove_title_score(sender, instance, **kwargs):
+    # Also runs for reviews removed by cascade from users and titles.
+    apply_review_score(instance.title_id, removed=instance.score)
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_titles(sender, instance, created=False, **kwargs):
+    # Titles embed their category, so their ETags must change with it.
+    if not created:
+        Title.objects.filter(category=instance).update(
+            updated_at=timezone.now()
+        )
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def touch_genre_titles(sender, instance, created=False, **kwargs):
+    if not created:
+        Title.objects.filter(genre=instance).update(
+            updated_at=timezone.now()
+        )
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_linked_titles(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    # Titles embed their genres too, however the links are written.
+    if action in ('post_add', 'post_remove'):
+        titles = (Title.objects.filter(pk__in=pk_set) if reverse
+                  else Title.objects.filter(pk=instance.pk))
+    elif action == 'pre_clear':
+        titles = (Title.objects.filter(genre=instance) if reverse
+                  else Title.objects.filter(pk=instance.pk))
+    else:
+        return
+    titles.update(updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=GenreTitle)
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def touch_genre_title(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if kwargs['signal'] is pre_save:
+        if instance._state.adding:
+            return
+        # An edited row also unlinks the title it pointed to.
+        titles = Title.objects.filter(genretitle__pk=instance.pk)
+    else:
+        titles = Title.objects.filter(pk=instance.title_id_id)
+    titles.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Title)
+def update_autocomplete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: index_instance(instance))
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Title)
+def remove_from_autocomplete(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: unindex_instance(sender, pk))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def refresh_autocomplete_rating(sender, instance, **kwargs):
+    title_id = instance.title_id
+    transaction.on_commit(
+        lambda: autocomplete_index.mark_title_dirty(title_id)
+    )
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def update_feed_affinity(sender, instance, **kwargs):
+    author_id, title_id = instance.author_id, instance.title_id
+    transaction.on_commit(lambda: mark_review_changed(author_id, title_id))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(m2m_changed, sender=Title.genre.through)
+def refresh_autocomplete_counts(sender, **kwargs):
+    # Genres and categories are ranked by the number of their titles.
+    transaction.on_commit(autocomplete_index.mark_counts_dirty)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def update_genre_bitmaps(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    pk = instance.pk
+    if action in ('post_add', 'post_remove'):
+        genre_ids, title_ids = (([pk], pk_set) if reverse
+                                else (pk_set, [pk]))
+        member = action == 'post_add'
+        transaction.on_commit(lambda: genre_bitmaps.set_membership(
+            genre_ids, title_ids, member
+        ))
+    elif action == 'post_clear':
+        transaction.on_commit(lambda: (
+            genre_bitmaps.clear_genre(pk) if reverse
+            else genre_bitmaps.clear_title(pk)
+        ))
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def update_genre_title_bitmap(sender, instance, created=False, **kwargs):
+    # Edits of an existing row don't say what it linked before.
+    if kwargs['signal'] is post_save and not created:
+        transaction.on_commit(genre_bitmaps.invalidate)
+        return
+    genre_id, title_id = instance.genre_id_id, instance.title_id_id
+    transaction.on_commit(lambda: genre_bitmaps.set_membership(
+        [genre_id], [title_id], created
+    ))
+
+
+@receiver(post_save, sender=Genre)
+def update_genre_slug(sender, instance, **kwargs):
+    pk, slug = instance.pk, instance.slug
+    transaction.on_commit(lambda: genre_bitmaps.set_genre(pk, slug))
+
+
+@receiver(post_delete, sender=Genre)
+def remove_genre_bitmap(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: genre_bitmaps.remove_genre(pk))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_user_version(sender, instance, **kwargs):
+    # Drops the user cached by CachedJWTAuthentication.
+    label = get_object_label(User, instance.pk)
+    transaction.on_commit(lambda: bump_versions([label]))
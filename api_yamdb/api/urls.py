@@ -1,7 +1,8 @@
 from django.urls import include, path
 from rest_framework.routers import SimpleRouter
 
-from api.views import (CategoryViewSet, CommentsViewSet, GenreViewSet,
+from api.views import (AutocompleteView, CategoryViewSet, CommentsViewSet,
+                       GenreViewSet, LeaderboardView, QueryStatsView,
                        ReviewViewSet, TitleViewSet, UserGetTokenView,
                        UserSignUpView, UsersViewSet)
 
@@ -33,6 +34,12 @@ urlpatterns = [
     path(
         'v1/', include([
             path('auth/', include(auth_urls)),
+            path('autocomplete/', AutocompleteView.as_view(),
+                 name='autocomplete'),
+            path('leaderboards/', LeaderboardView.as_view(),
+                 name='leaderboards'),
+            path('query-stats/', QueryStatsView.as_view(),
+                 name='query_stats'),
             path('', include(v1_router.urls)),
         ])
     )
@@ -1,11 +1,110 @@
+import smtplib
+import uuid
+from datetime import timedelta
+
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from reviews.models import OutboxEmail
 
 
 def send_confirmation_email(email, confirmation_code):
-    send_mail(
+    """Ставит письмо с кодом в очередь; отправляет его send_outbox_emails.
+
+    Вызывается в транзакции регистрации, поэтому письмо появляется
+    в очереди только вместе с пользователем.
+    """
+    OutboxEmail.objects.create(
+        recipient=email,
         subject='Confirmation code',
         message=f'Your confirmation code is {confirmation_code}',
-        from_email=settings.EMAIL_ADDRESS,
-        recipient_list=[email]
     )
+
+
+def get_retry_delay(attempts):
+    return timedelta(
+        seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def mark_failed(email, error, now):
+    email.attempts += 1
+    email.last_error = str(error)
+    email.send_after = now + get_retry_delay(email.attempts)
+
+
+def claim_outbox_emails(batch_size, now):
+    """Захватывает пачку писем для этого отправителя.
+
+    UPDATE повторяет условия выборки, поэтому из двух отправителей,
+    выбравших одни письма, их получает только первый. Захваченные
+    письма откладываются на EMAIL_OUTBOX_CLAIM_TIMEOUT: если отправитель
+    упадёт, их заберёт другой.
+    """
+    pending = OutboxEmail.objects.filter(
+        sent_at__isnull=True,
+        send_after__lte=now,
+        attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    )
+    ids = list(pending.order_by('id').values_list('id', flat=True)[
+        :batch_size
+    ])
+    if not ids:
+        return []
+    token = uuid.uuid4()
+    pending.filter(pk__in=ids).update(
+        claim_token=token,
+        send_after=now + timedelta(
+            seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT
+        ),
+    )
+    return list(OutboxEmail.objects.filter(claim_token=token).order_by('id'))
+
+
+def deliver_outbox_emails(batch_size=None):
+    """Отправляет пачку писем из очереди через одно соединение.
+
+    Неудачные письма откладываются с экспоненциальной задержкой,
+    пока не исчерпан EMAIL_OUTBOX_MAX_ATTEMPTS. Возвращает число
+    отправленных и неотправленных писем.
+    """
+    now = timezone.now()
+    batch = claim_outbox_emails(
+        batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE, now
+    )
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except (smtplib.SMTPException, OSError) as error:
+        for email in batch:
+            mark_failed(email, error, now)
+        failed = len(batch)
+    else:
+        try:
+            for email in batch:
+                message = EmailMessage(
+                    subject=email.subject,
+                    body=email.message,
+                    from_email=settings.EMAIL_ADDRESS,
+                    to=[email.recipient],
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except (smtplib.SMTPException, OSError) as error:
+                    mark_failed(email, error, now)
+                    failed += 1
+                else:
+                    email.sent_at = timezone.now()
+                    sent += 1
+        finally:
+            connection.close()
+    OutboxEmail.objects.bulk_update(
+        batch, ('attempts', 'last_error', 'send_after', 'sent_at')
+    )
+    return sent, failed
@@ -1,31 +1,50 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Avg
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, F
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import (filters, permissions,
+from rest_framework import (filters, generics, permissions,
                             status, viewsets)
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework.views import APIView
 
-from api.filters import TitleFilter
+from api.autocomplete import autocomplete_index
+from api.cache import (ConditionalGetMixin, VersionedCacheMixin,
+                       VersionedCacheRetrieveMixin)
+from api.feed import get_ranking
+from api.filters import ORDERING_CHOICES, TitleFilter, get_ordering_key
+from api.middleware import get_route_stats, reset_route_stats
+from api.pagination import KeysetOptInPagination
 from api.permissions import (IsAdminOrReadOnly,
                              IsAdminOrSuperuser,
                              IsAuthorAdminModeratorOrReadOnly)
-from api.serializers import (CategorySerializer, CommentSerializer,
-                             GenreSerializer, ReviewSerializer,
-                             TitleListSerializer, TitleSerializer,
-                             UserGetTokenSerializer, UserSerializer,
-                             UserSignUpSerializer)
+from api.serializers import (AutocompleteQuerySerializer,
+                             CategorySerializer, CommentSerializer,
+                             FeedTitleSerializer, GenreSerializer,
+                             LeaderboardQuerySerializer,
+                             LeaderboardTitleSerializer, ReviewSerializer,
+                             SimilarTitleSerializer, TitleListSerializer,
+                             TitleSerializer, UserGetTokenSerializer,
+                             UserSerializer, UserSignUpSerializer)
 from api.utils import send_confirmation_email
 from api.viewsets import ListCreateDestroyViewSet
 from reviews.constants import USER_PROFILE_PATH
-from reviews.models import Category, Genre, Review, Title
+from reviews.models import (SCORE_COUNT_FIELDS, Category, Genre, GenreTitle,
+                            LeaderboardEntry, Review, Title)
 
 User = get_user_model()
 
+# Columns read by the serializers, the author check and ETag probes.
+REVIEW_FIELDS = ('id', 'text', 'score', 'pub_date', 'updated_at',
+                 'title_id', 'author_id', 'author__username')
+COMMENT_FIELDS = ('id', 'text', 'pub_date', 'updated_at',
+                  'review_id', 'author_id', 'author__username')
+
 
 class UserSignUpView(APIView):
     permission_classes = (permissions.AllowAny,)
@@ -33,10 +52,11 @@ class UserSignUpView(APIView):
     def post(self, request, *args, **kwargs):
         serializer = UserSignUpSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-        confirmation_code = default_token_generator.make_token(user)
-        send_confirmation_email(email=user.email,
-                                confirmation_code=confirmation_code)
+        with transaction.atomic():
+            user = serializer.save()
+            confirmation_code = default_token_generator.make_token(user)
+            send_confirmation_email(email=user.email,
+                                    confirmation_code=confirmation_code)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -56,6 +76,61 @@ class UserGetTokenView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class QueryStatsView(APIView):
+    permission_classes = (IsAdminOrSuperuser,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_route_stats(), status=status.HTTP_200_OK)
+
+    def delete(self, request, *args, **kwargs):
+        reset_route_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class AutocompleteView(APIView):
+    permission_classes = (permissions.AllowAny,)
+
+    def get(self, request, *args, **kwargs):
+        serializer = AutocompleteQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(
+            autocomplete_index.search(
+                serializer.validated_data['q'],
+                serializer.validated_data['limit'],
+                kind=serializer.validated_data.get('type')
+            ),
+            status=status.HTTP_200_OK
+        )
+
+
+class LeaderboardView(APIView):
+    permission_classes = (permissions.AllowAny,)
+
+    @staticmethod
+    def get_titles(kind, slug):
+        # Members come from the leaderboard index, the order from the
+        # weighted rating kept current by review writes.
+        return Title.objects.filter(
+            leaderboard_entries__kind=kind,
+            leaderboard_entries__slug=slug,
+            weighted_rating__isnull=False
+        ).only(*LeaderboardTitleSerializer.Meta.fields).order_by(
+            '-weighted_rating', 'id'
+        )
+
+    def get(self, request, *args, **kwargs):
+        serializer = LeaderboardQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        kind, slug = LeaderboardEntry.ALL, ''
+        for scope in (LeaderboardEntry.CATEGORY, LeaderboardEntry.GENRE):
+            if scope in params:
+                kind, slug = scope, params[scope]
+        titles = self.get_titles(kind, slug)[:params['limit']]
+        return Response(LeaderboardTitleSerializer(titles, many=True).data,
+                        status=status.HTTP_200_OK)
+
+
 class UsersViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -71,47 +146,160 @@ class UsersViewSet(viewsets.ModelViewSet):
             permission_classes=(permissions.IsAuthenticated,),
             detail=False)
     def get_user_profile(self, request):
+        # request.user may come from the auth cache and be up to
+        # AUTH_USER_CACHE_TIMEOUT old: a save from it would write back
+        # a stale role or password hash.
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == 'GET':
-            user = get_object_or_404(User,
-                                     username=request.user.username)
             serializer = UserSerializer(user)
             return Response(serializer.data,
                             status=status.HTTP_200_OK)
-        serializer = UserSerializer(request.user,
+        serializer = UserSerializer(user,
                                     data=request.data,
                                     partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save(role=request.user.role)
+        serializer.save(role=user.role)
         return Response(serializer.data,
                         status=status.HTTP_200_OK)
 
+    @action(methods=('get',),
+            url_path=f'{USER_PROFILE_PATH}/feed',
+            permission_classes=(permissions.IsAuthenticated,),
+            detail=False)
+    def feed(self, request):
+        # Only the page of the cached ranking is read from the database.
+        page = self.paginate_queryset(get_ranking(request.user.pk))
+        titles = Title.objects.select_related('category').prefetch_related(
+            'genre'
+        ).defer(*SCORE_COUNT_FIELDS.values()).in_bulk(
+            [title_id for title_id, _ in page]
+        )
+        for title_id, affinity in page:
+            if title_id in titles:
+                titles[title_id].affinity = affinity
+        return self.get_paginated_response(FeedTitleSerializer(
+            [titles[title_id] for title_id, _ in page if title_id in titles],
+            many=True
+        ).data)
+
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+class CategoryViewSet(VersionedCacheMixin, ListCreateDestroyViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_models = (Category,)
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(VersionedCacheMixin, ListCreateDestroyViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_models = (Genre,)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all().annotate(rating=Avg('reviews__score'))
+class TitleViewSet(ConditionalGetMixin, VersionedCacheRetrieveMixin,
+                   viewsets.ModelViewSet):
+    # The histogram is read only by /scores/.
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre').defer(*SCORE_COUNT_FIELDS.values())
     serializer_class = TitleListSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
     permission_classes = (IsAdminOrReadOnly,)
     http_method_names = ('get', 'post', 'patch', 'delete')
     ordering = ('-year', 'name',)
+    pagination_class = KeysetOptInPagination
+    keyset_ordering = ('-year', 'name', 'id')
+    cache_models = (Title,)
+
+    def get_keyset_ordering(self):
+        # The cursor follows ?ordering=, already validated by TitleFilter.
+        ordering = self.request.query_params.get('ordering')
+        if ordering in ORDERING_CHOICES:
+            return get_ordering_key(ordering)
+        return self.keyset_ordering
 
     def get_serializer_class(self):
         if self.request.method in permissions.SAFE_METHODS:
             return TitleListSerializer
         return TitleSerializer
 
+    @action(methods=('get',), detail=False)
+    def facets(self, request):
+        return self.cached_response(self.count_facets, request)
+
+    @action(methods=('get',), detail=True)
+    def scores(self, request, pk=None):
+        return self.cached_response(self.read_scores, request, pk=pk)
+
+    def read_scores(self, request, pk=None):
+        # Counters are kept current by review writes: one row, no scan.
+        # DRF's variant answers 404 to a malformed pk.
+        title = generics.get_object_or_404(Title.objects.values(
+            'rating', 'reviews_count', *SCORE_COUNT_FIELDS.values()
+        ), pk=pk)
+        return Response({
+            'rating': title['rating'],
+            'reviews_count': title['reviews_count'],
+            'scores': {str(score): title[field]
+                       for score, field in SCORE_COUNT_FIELDS.items()},
+        }, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def get_similar_titles(pk):
+        return Title.objects.filter(similar_to__title_id=pk).annotate(
+            similarity=F('similar_to__score')
+        ).only('id', 'name', 'year', 'rating').order_by('-similarity', 'id')
+
+    @action(methods=('get',), detail=True)
+    def similar(self, request, pk=None):
+        # Neighbours are precomputed by build_similar_titles.
+        try:
+            pk = Title._meta.pk.to_python(pk)
+        except ValidationError:
+            raise Http404
+        titles = list(self.get_similar_titles(pk))
+        if not titles:
+            get_object_or_404(Title.objects.only('id'), pk=pk)
+        return Response(SimilarTitleSerializer(titles, many=True).data,
+                        status=status.HTTP_200_OK)
+
+    @staticmethod
+    def get_facet_querysets(titles):
+        """Запросы счётчиков фасетов для отфильтрованных произведений.
+
+        Значений у фасета немного, поэтому они сортируются в Python,
+        а не временным B-деревом поверх группировки.
+        """
+        titles = titles.order_by()
+        return {
+            'genre': GenreTitle.objects.filter(
+                title_id__in=titles.values('id')
+            ).order_by().values(slug=F('genre_id__slug')).annotate(
+                count=Count('id')
+            ),
+            'category': titles.filter(category__isnull=False).values(
+                slug=F('category__slug')
+            ).annotate(count=Count('id')),
+            'year': titles.values('year').annotate(count=Count('id')),
+        }
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    def count_facets(self, request):
+        # One grouped query per facet instead of a request per value.
+        facets = self.get_facet_querysets(
+            self.filter_queryset(self.get_queryset())
+        )
+        return Response({
+            'genre': sorted(facets['genre'], key=lambda row: (
+                -row['count'], row['slug']
+            )),
+            'category': sorted(facets['category'], key=lambda row: (
+                -row['count'], row['slug']
+            )),
+            'year': sorted(facets['year'], key=lambda row: -row['year']),
+        }, status=status.HTTP_200_OK)
+
+
+class ReviewViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = (
         IsAuthorAdminModeratorOrReadOnly,
@@ -119,38 +307,64 @@ class ReviewViewSet(viewsets.ModelViewSet):
     )
     title_id_kwarg = 'title_id'
     http_method_names = ('get', 'post', 'patch', 'delete')
+    pagination_class = KeysetOptInPagination
+    keyset_ordering = ('-pub_date', '-id')
 
     def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs[self.title_id_kwarg])
+        # Resolved once per request: get_queryset, perform_create and
+        # ReviewSerializer.validate all need the parent title.
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title.objects.only('id'), pk=self.kwargs[self.title_id_kwarg]
+            )
+        return self._title
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.get_title().reviews.select_related('author').only(
+            *REVIEW_FIELDS
+        )
 
+    # Review signals update the title counters in the same transaction.
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user,
-            title=self.get_title()
-        )
+        serializer.save(author=self.request.user, title=self.get_title())
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
 
-class CommentsViewSet(viewsets.ModelViewSet):
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+
+
+class CommentsViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (
         IsAuthorAdminModeratorOrReadOnly,
         permissions.IsAuthenticatedOrReadOnly
     )
+    title_id_kwarg = 'title_id'
     review_id_kwarg = 'review_id'
     http_method_names = ('get', 'post', 'patch', 'delete')
+    pagination_class = KeysetOptInPagination
+    keyset_ordering = ('-pub_date', '-id')
 
     def get_review(self):
-        return get_object_or_404(
-            Review,
-            pk=self.kwargs[self.review_id_kwarg],
-            title=get_object_or_404(Title, pk=self.kwargs['title_id']),
-        )
+        # A review found under the given title_id also proves the title
+        # exists, so one query replaces the Title and Review lookups.
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review.objects.only('id', 'title_id'),
+                pk=self.kwargs[self.review_id_kwarg],
+                title_id=self.kwargs[self.title_id_kwarg],
+            )
+        return self._review
 
     def get_queryset(self):
-        return self.get_review().comments.select_related('author')
+        return self.get_review().comments.select_related('author').only(
+            *COMMENT_FIELDS
+        )
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, review=self.get_review())
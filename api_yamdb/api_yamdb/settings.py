@@ -28,6 +28,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.QueryStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -69,6 +70,33 @@ DATABASES = {
     }
 }
 
+# Cache
+
+# Shared by every process on the machine, so version bumps made by one
+# worker or by management commands (migrate_from_csv, recalculate_ratings)
+# invalidate the responses cached by the others
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache',
+        'OPTIONS': {
+            # Culling drops random keys, model versions included.
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+API_CACHE_ALIAS = 'default'
+
+API_CACHE_TIMEOUT = 300
+
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Seconds before per-process indexes (autocomplete, genre bitmaps) are
+# rebuilt even without a visible version change: writes that bump no
+# version, or bumps lost to a cache that is not shared, are seen this way
+LOCAL_INDEX_MAX_AGE = 60
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -112,7 +140,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES':
         ('rest_framework.permissions.IsAuthenticated',),
     'DEFAULT_AUTHENTICATION_CLASSES':
-        ('rest_framework_simplejwt.authentication.JWTAuthentication',),
+        ('api.authentication.CachedJWTAuthentication',),
     'DEFAULT_PAGINATION_CLASS':
         'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
@@ -123,8 +151,52 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Share of requests whose SQL queries are counted and timed (0 disables)
+QUERY_STATS_SAMPLE_RATE = 0.01
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'api' / 'sent_emails'
 
 EMAIL_ADDRESS = 'registration@yamb.ru'
+
+# Outbox drained by the send_outbox_emails command
+EMAIL_OUTBOX_BATCH_SIZE = 100
+
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+
+# Seconds before the first retry, doubled after every failed attempt
+EMAIL_OUTBOX_RETRY_DELAY = 30
+
+# Seconds a claimed batch is hidden from other senders; emails of a
+# sender that died are picked up again after it
+EMAIL_OUTBOX_CLAIM_TIMEOUT = 600
+
+# Weighted rating: (sum of scores + m * mean score) / (reviews + m)
+WEIGHTED_RATING_MIN_REVIEWS = 10
+
+# Seconds a process reuses the mean score of all reviews
+WEIGHTED_RATING_MEAN_TIMEOUT = 3600
+
+LEADERBOARD_SIZE = 100
+
+# Similar titles built by the build_similar_titles command
+SIMILAR_TITLES_COUNT = 10
+
+# Only reviews with at least this score count as "liked"
+SIMILAR_TITLES_MIN_SCORE = 7
+
+# Titles whose neighbours are accumulated in memory per pass over reviews
+SIMILAR_TITLES_CHUNK_SIZE = 1000
+
+# Personal feed: reviews with at least this score shape the user's tastes
+FEED_MIN_SCORE = 7
+
+# Seconds a cached taste vector lives; bounds drift from writes that
+# bypass review signals (bulk imports, genre edits of liked titles)
+FEED_AFFINITY_TIMEOUT = 3600
+
+# Feed candidates come from this many of the user's heaviest genres and
+# categories; at most FEED_SIZE ranked titles are cached per user
+FEED_TOP_TASTES = 10
+FEED_SIZE = 500
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth import get_user_model
 
 from reviews.models import (Category, Comment, Genre,
-                            GenreTitle, Review, Title)
+                            GenreTitle, OutboxEmail, Review, Title)
 
 
 User = get_user_model()
@@ -64,3 +64,11 @@ class CommentAdmin(admin.ModelAdmin):
     list_display = ('author', 'review', 'pub_date')
     search_fields = ('author__username',)
     list_filter = ('pub_date',)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'subject', 'attempts',
+                    'send_after', 'sent_at')
+    search_fields = ('recipient',)
+    list_filter = ('sent_at',)
@@ -12,3 +12,7 @@ MAX_VALUE_SCORE = 10
 INVALID_CHAR = r'^[\w.@+-]+\Z'
 
 USER_PROFILE_PATH = 'me'
+
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+AUTOCOMPLETE_TYPES = ('title', 'genre', 'category')
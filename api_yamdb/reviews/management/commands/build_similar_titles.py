@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.similarity import build_similar_titles
+
+
+class Command(BaseCommand):
+    help = 'rebuild similar titles from co-occurring high review scores'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            help='neighbours stored per title'
+        )
+        parser.add_argument(
+            '--min-score',
+            type=int,
+            help='lowest review score that counts as liked'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='titles processed per pass over reviews; bounds memory'
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        titles, stored = build_similar_titles(
+            options['count'], options['min_score'], options['chunk_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {stored} neighbour(s) for {titles} title(s) in '
+            f'{time.perf_counter() - start:.2f}s'
+        ))
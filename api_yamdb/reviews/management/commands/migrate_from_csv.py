@@ -1,17 +1,37 @@
 import csv
-from typing import Any, Optional
+import hashlib
+import os
+import time
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+from typing import Iterable, Iterator, Optional
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.management.base import BaseCommand
-from django.db import models
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from django.utils import timezone
 
-from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from api.cache import bump_model_versions
+from reviews.models import (Category, Comment, Genre, GenreTitle,
+                            ImportCheckpoint, Review, Title)
 
 User = get_user_model()
 
+DEFAULT_BATCH_SIZE = 5000
+HASH_BLOCK = 1024 * 1024
+# Parsed chunks a worker may hold ahead of the loader
+QUEUE_CHUNKS = 2
+
+# (смещение в байтах, число строк, sha256 прочитанной части)
+Checkpoint = tuple[int, int, str]
+# (строки пачки, смещение после неё, строк всего, sha256 до смещения)
+ParsedChunk = tuple[list[dict], int, int, str]
+
 ALLOWED_FILES_DICT: list[
-    tuple[str, Any[models.Model], Optional[dict[str, str]]]
+    tuple[str, type[models.Model], Optional[dict[str, str]]]
 ] = [
     ('category', Category, {}),
     ('genre', Genre, {}),
@@ -22,7 +42,7 @@ ALLOWED_FILES_DICT: list[
     ('comments', Comment, {'review_id': 'review'}),
 ]
 
-COLUMN_FOREIGN_MODEL: dict[str, models.Model] = {
+COLUMN_FOREIGN_MODEL: dict[str, type[models.Model]] = {
     'category': Category,
     'title_id': Title,
     'genre_id': Genre,
@@ -31,32 +51,304 @@ COLUMN_FOREIGN_MODEL: dict[str, models.Model] = {
 }
 
 
-def load_data(filename: str, model: models.Model, mappings: dict):
-    with open(
-            f'{settings.DATA_CSV_DIR}/{filename}.csv',
-            encoding='utf-8'
-    ) as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            original = dict(row)
-            data = dict(row)
-            for key in original.keys():
-                if key in COLUMN_FOREIGN_MODEL:
-                    foreign_model: models.Model = COLUMN_FOREIGN_MODEL.get(key)
-                    foreign_model_key = key
-                    if key in mappings.keys():
-                        data.pop(key)
-                        foreign_model_key = mappings.get(key)
-                    data[foreign_model_key] = foreign_model.objects.get(
-                        pk=original[key]
-                    )
-            if not model.objects.filter(pk=data['id']).exists():
-                model.objects.create(**data)
+def get_csv_path(filename: str) -> str:
+    return f'{settings.DATA_CSV_DIR}/{filename}.csv'
+
+
+def read_header(filename: str) -> list[str]:
+    with open(get_csv_path(filename), encoding='utf-8') as file:
+        return next(csv.reader(file), [])
+
+
+def get_column_attnames(model: type[models.Model], columns, mappings: dict):
+    """Сопоставляет колонки CSV с атрибутами модели.
+
+    Колонки внешних ключей пишутся сразу в `<field>_id`, поэтому
+    связанные строки не загружаются из базы.
+    """
+    attnames = {}
+    for column in columns:
+        if column in COLUMN_FOREIGN_MODEL:
+            field = model._meta.get_field(mappings.get(column, column))
+            attnames[column] = field.attname
+        else:
+            attnames[column] = column
+    return attnames
+
+
+def build_import_levels(files=ALLOWED_FILES_DICT):
+    """Раскладывает файлы по уровням графа внешних ключей.
+
+    Файлы одного уровня зависят только от файлов предыдущих уровней,
+    поэтому их можно разбирать одновременно.
+    """
+    file_by_model = {model: filename for filename, model, _ in files}
+    dependencies = {
+        filename: {
+            file_by_model[COLUMN_FOREIGN_MODEL[column]]
+            for column in read_header(filename)
+            if column in COLUMN_FOREIGN_MODEL
+        }
+        for filename, _, _ in files
+    }
+    levels, done = [], set()
+    while len(done) < len(files):
+        level = [filename for filename, _, _ in files
+                 if filename not in done and dependencies[filename] <= done]
+        if not level:
+            raise CommandError('Cyclic foreign keys between csv files')
+        levels.append(level)
+        done.update(level)
+    return levels
+
+
+class TrackedLines:
+    """Итератор строк файла, считающий смещение и хэш прочитанного.
+
+    csv.reader забирает строки по одной, поэтому после каждой записи
+    смещение и хэш указывают ровно на её конец.
+    """
+    def __init__(self, file, offset, hasher):
+        self.file = file
+        self.offset = offset
+        self.hasher = hasher
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.file.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        self.hasher.update(line)
+        return line.decode('utf-8')
+
+
+def find_resume_point(file, checkpoint: Optional[Checkpoint],
+                      filename: str = ''):
+    """Возвращает (смещение, хэш, число строк), с которых продолжать.
+
+    Файл может только дописываться: если начало до контрольной точки
+    изменилось, загруженные строки не обновились бы (вставка пропускает
+    существующие ключи), поэтому импорт останавливается с ошибкой.
+    """
+    if checkpoint is not None:
+        offset, rows, content_hash = checkpoint
+        hasher = hashlib.sha256()
+        remaining = offset
+        while remaining and (block := file.read(min(remaining, HASH_BLOCK))):
+            hasher.update(block)
+            remaining -= len(block)
+        if remaining or hasher.hexdigest() != content_hash:
+            raise ValueError(
+                f'{filename}.csv changed before its checkpoint '
+                f'({rows} rows, {offset} bytes): only appending rows is '
+                'supported; run with --restart to read it from the start, '
+                'already imported rows are kept as they are'
+            )
+        return offset, hasher, rows
+    file.seek(0)
+    hasher = hashlib.sha256()
+    header = file.readline()
+    hasher.update(header)
+    return len(header), hasher, 0
+
+
+def parse_chunks(filename: str, attnames: dict, batch_size: int,
+                 checkpoint: Optional[Checkpoint] = None
+                 ) -> Iterator[ParsedChunk]:
+    key_columns = [column for column in attnames
+                   if column == 'id' or column in COLUMN_FOREIGN_MODEL]
+    with open(get_csv_path(filename), 'rb') as file:
+        fieldnames = next(csv.reader([file.readline().decode('utf-8')]))
+        file.seek(0)
+        offset, hasher, total = find_resume_point(file, checkpoint,
+                                                  filename)
+        lines = TrackedLines(file, offset, hasher)
+        reader = csv.DictReader(lines, fieldnames=fieldnames)
+        while True:
+            chunk = []
+            for row in islice(reader, batch_size):
+                total += 1
+                validate_row(filename, total, row, key_columns)
+                chunk.append(
+                    {attnames[key]: value for key, value in row.items()}
+                )
+            if not chunk:
+                return
+            yield chunk, lines.offset, total, hasher.hexdigest()
+
+
+def validate_row(filename: str, row_num: int, row: dict, key_columns):
+    if None in row or None in row.values():
+        raise ValueError(f'{filename}.csv row {row_num}: '
+                         'wrong number of columns')
+    for column in key_columns:
+        if not row[column].isdigit():
+            raise ValueError(
+                f'{filename}.csv row {row_num}: {column} must be an integer'
+            )
+
+
+def parse_into_queue(queue, filename: str, attnames: dict, batch_size: int,
+                     checkpoint: Optional[Checkpoint] = None):
+    """Разбирает файл в процессе пула, отдавая пачки через очередь.
+
+    Очередь ограничена, поэтому воркер ждёт, пока загрузчик заберёт
+    пачки, и файл целиком в памяти не оказывается.
+    """
+    try:
+        for chunk in parse_chunks(filename, attnames, batch_size,
+                                  checkpoint):
+            queue.put(chunk)
+    finally:
+        queue.put(None)
+
+
+def iter_queue(queue, future) -> Iterator[ParsedChunk]:
+    while (chunk := queue.get()) is not None:
+        yield chunk
+    # Re-raises a parsing error of the worker.
+    future.result()
+
+
+def touch_linked_titles(rows: list[dict]):
+    """Меняет updated_at произведений, получивших жанры из файла.
+
+    Жанры входят в ответ произведения, поэтому без этого его ETag
+    не изменился бы.
+    """
+    attname = GenreTitle._meta.get_field('title_id').attname
+    Title.objects.filter(
+        pk__in={row[attname] for row in rows}
+    ).update(updated_at=timezone.now())
+
+
+def load_chunks(filename: str, model: type[models.Model],
+                chunks: Iterable[ParsedChunk],
+                batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Вставляет пачки строк, сохраняя контрольную точку в той же
+    транзакции, что и саму пачку."""
+    loaded = 0
+    for rows, offset, total, content_hash in chunks:
+        with transaction.atomic():
+            model.objects.bulk_create(
+                [model(**row) for row in rows],
+                batch_size=batch_size, ignore_conflicts=True
+            )
+            if model is GenreTitle:
+                touch_linked_titles(rows)
+            ImportCheckpoint.objects.update_or_create(
+                filename=filename,
+                defaults={'byte_offset': offset, 'rows': total,
+                          'content_hash': content_hash}
+            )
+        loaded += len(rows)
+    return loaded
+
+
+def get_checkpoints() -> dict[str, Checkpoint]:
+    return {
+        checkpoint.filename: (checkpoint.byte_offset, checkpoint.rows,
+                              checkpoint.content_hash)
+        for checkpoint in ImportCheckpoint.objects.all()
+    }
+
+
+def load_data(filename: str, model: type[models.Model], mappings: dict,
+              batch_size: int = DEFAULT_BATCH_SIZE,
+              checkpoint: Optional[Checkpoint] = None) -> int:
+    attnames = get_column_attnames(model, read_header(filename), mappings)
+    return load_chunks(
+        filename, model,
+        parse_chunks(filename, attnames, batch_size, checkpoint),
+        batch_size
+    )
 
 
 class Command(BaseCommand):
     help = 'import data from csv'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='rows per INSERT batch and transaction'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='processes parsing csv files in parallel; each holds '
+                 f'at most {QUEUE_CHUNKS} parsed batches ahead of the loader'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='ignore saved checkpoints and read every file from the '
+                 'start; rows already in the database are not updated'
+        )
+
+    def report(self, filename, rows, start):
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{filename}: {rows} rows in {elapsed:.2f}s '
+            f'({rows / elapsed if elapsed else rows:.0f} rows/s)'
+        )
+
     def handle(self, *args, **options):
-        for filename, model, mappings in ALLOWED_FILES_DICT:
-            load_data(filename, model, mappings)
+        batch_size = options['batch_size']
+        files = {filename: (model, mappings)
+                 for filename, model, mappings in ALLOWED_FILES_DICT}
+        levels = build_import_levels()
+        checkpoints = {} if options['restart'] else get_checkpoints()
+        try:
+            if options['workers'] <= 1:
+                self.load_sequential(files, levels, checkpoints, batch_size)
+            else:
+                self.load_parallel(files, levels, checkpoints,
+                                   options['workers'], batch_size)
+        except ValueError as error:
+            raise CommandError(error)
+        call_command('recalculate_ratings')
+        call_command('refresh_leaderboards')
+        # bulk_create sends no signals, so cached API responses are
+        # invalidated explicitly.
+        bump_model_versions(Category, Genre, Title)
+
+    def load_sequential(self, files, levels, checkpoints, batch_size):
+        for level in levels:
+            for filename in level:
+                start = time.perf_counter()
+                model, mappings = files[filename]
+                rows = load_data(filename, model, mappings, batch_size,
+                                 checkpoints.get(filename))
+                self.report(filename, rows, start)
+
+    def load_parallel(self, files, levels, checkpoints, workers,
+                      batch_size):
+        order = [filename for level in levels for filename in level]
+        # The manager exits first: if loading fails, workers blocked on
+        # a full queue get an error instead of hanging the pool.
+        with ProcessPoolExecutor(max_workers=workers) as pool, \
+                Manager() as manager:
+            # Submitted in loading order: the pool starts tasks FIFO, so
+            # the file being loaded is always running before the later
+            # ones that may wait on their full queues.
+            parsed = {}
+            for filename in order:
+                model, mappings = files[filename]
+                queue = manager.Queue(maxsize=QUEUE_CHUNKS)
+                parsed[filename] = queue, pool.submit(
+                    parse_into_queue, queue, filename,
+                    get_column_attnames(model, read_header(filename),
+                                        mappings),
+                    batch_size, checkpoints.get(filename)
+                )
+            for filename in order:
+                start = time.perf_counter()
+                rows = load_chunks(filename, files[filename][0],
+                                   iter_queue(*parsed[filename]), batch_size)
+                self.report(filename, rows, start)
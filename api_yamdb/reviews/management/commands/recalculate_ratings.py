@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api.cache import bump_model_versions
+from reviews.models import SCORE_COUNT_FIELDS, Title
+from reviews.ratings import (collect_review_stats, collect_score_histograms,
+                             expected_rating)
+
+BATCH_SIZE = 500
+RATING_TOLERANCE = 1e-9
+
+
+def is_rating_equal(stored, expected):
+    if stored is None or expected is None:
+        return stored is expected
+    return abs(stored - expected) < RATING_TOLERANCE
+
+
+class Command(BaseCommand):
+    help = 'rebuild and verify stored title ratings and score histograms'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='only verify stored values, fail on mismatch'
+        )
+
+    def handle(self, *args, **options):
+        stats = collect_review_stats()
+        histograms = collect_score_histograms()
+        score_fields = list(SCORE_COUNT_FIELDS.values())
+        mismatched = []
+        titles = Title.objects.only(
+            'id', 'rating', 'reviews_sum', 'reviews_count', *score_fields
+        ).order_by('pk')
+        for title in titles.iterator(chunk_size=BATCH_SIZE):
+            score_sum, score_count = stats.get(title.pk, (0, 0))
+            rating = expected_rating(score_sum, score_count)
+            histogram = {field: histograms.get(title.pk, {}).get(field, 0)
+                         for field in score_fields}
+            if (title.reviews_sum == score_sum
+                    and title.reviews_count == score_count
+                    and is_rating_equal(title.rating, rating)
+                    and all(getattr(title, field) == count
+                            for field, count in histogram.items())):
+                continue
+            title.reviews_sum = score_sum
+            title.reviews_count = score_count
+            title.rating = rating
+            for field, count in histogram.items():
+                setattr(title, field, count)
+            title.updated_at = timezone.now()
+            mismatched.append(title)
+
+        if options['check']:
+            if mismatched:
+                raise CommandError(
+                    f'{len(mismatched)} title(s) have stale ratings: '
+                    + ', '.join(str(title.pk) for title in mismatched[:20])
+                )
+            self.stdout.write(self.style.SUCCESS('All ratings are valid'))
+            return
+
+        with transaction.atomic():
+            Title.objects.bulk_update(
+                mismatched,
+                ('rating', 'reviews_sum', 'reviews_count', 'updated_at',
+                 *score_fields),
+                batch_size=BATCH_SIZE
+            )
+        if mismatched:
+            bump_model_versions(Title)
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt ratings for {len(mismatched)} '
+                               'title(s)')
+        )
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.ratings import refresh_leaderboards
+
+
+class Command(BaseCommand):
+    help = 'recompute weighted ratings and rebuild title leaderboards'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size',
+            type=int,
+            help='titles kept in every leaderboard'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='keep refreshing until interrupted'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=300.0,
+            help='seconds between refreshes'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            ratings, entries = refresh_leaderboards(options['size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Updated {ratings} weighted rating(s), '
+                f'{entries} leaderboard place(s)'
+            ))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,44 @@
+# Generated by Django 3.2 on 2026-10-18 03:20
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_ratings(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    stats = Review.objects.order_by().values('title_id').annotate(
+        score_sum=Sum('score'), score_count=Count('id')
+    )
+    for row in stats:
+        Title.objects.filter(pk=row['title_id']).update(
+            reviews_sum=row['score_sum'],
+            reviews_count=row['score_count'],
+            rating=row['score_sum'] / row['score_count'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_auto_20240821_1224'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='reviews_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-18 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=256, unique=True, verbose_name='Файл')),
+                ('byte_offset', models.PositiveBigIntegerField(default=0, verbose_name='Смещение в байтах')),
+                ('rows', models.PositiveBigIntegerField(default=0, verbose_name='Загружено строк')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='SHA-256 загруженной части')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'контрольная точка импорта',
+                'verbose_name_plural': 'Контрольные точки импорта',
+                'ordering': ('filename',),
+            },
+        ),
+    ]
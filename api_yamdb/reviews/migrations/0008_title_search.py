@@ -0,0 +1,36 @@
+# Generated by Django 3.2 on 2026-10-18 03:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+import reviews.search
+
+
+def create_fts_index(apps, schema_editor):
+    reviews.search.run_on_sqlite(schema_editor, reviews.search.CREATE_FTS_SQL)
+
+
+def drop_fts_index(apps, schema_editor):
+    reviews.search.run_on_sqlite(schema_editor, reviews.search.DROP_FTS_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_outboxemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleSearch',
+            fields=[
+                ('title', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search', serialize=False, to='reviews.title', verbose_name='Произведение')),
+                ('document', reviews.search.SearchDocumentField(db_column='reviews_title_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'reviews_title_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.2 on 2026-10-18 04:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+import reviews.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_title_rating_name_indexes'),
+    ]
+
+    operations = [
+        # Adding or removing a column rebuilds reviews_title on SQLite
+        # and drops the full-text search triggers.
+        migrations.RunPython(migrations.RunPython.noop,
+                             reviews.search.restore_fts_triggers),
+        migrations.AddField(
+            model_name='title',
+            name='weighted_rating',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Взвешенный рейтинг'),
+        ),
+        migrations.RunPython(reviews.search.restore_fts_triggers,
+                             migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('all', 'Все произведения'), ('category', 'Категория'), ('genre', 'Жанр')], max_length=8, verbose_name='Топ')),
+                ('slug', models.SlugField(blank=True, db_index=False, verbose_name='Slug категории или жанра')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'место в топе',
+                'verbose_name_plural': 'Топы произведений',
+                'ordering': ('kind', 'slug'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('kind', 'slug', 'title'), name='unique_leaderboard_title'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 3.2 on 2026-10-18 04:07
+
+from django.db import migrations, models
+from django.db.models import Count
+import reviews.search
+
+
+def fill_score_histograms(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    stats = Review.objects.order_by().values('title_id', 'score').annotate(
+        score_count=Count('id')
+    )
+    for row in stats:
+        Title.objects.filter(pk=row['title_id']).update(
+            **{f'score_{row["score"]}_count': row['score_count']}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_weighted_rating_leaderboards'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop,
+                             reviews.search.restore_fts_triggers),
+        migrations.AddField(
+            model_name='title',
+            name='score_10_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 10'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_1_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 1'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_2_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 2'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_3_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 3'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_4_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 4'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_5_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 5'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_6_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 6'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_7_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 7'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_8_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 8'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_9_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 9'),
+        ),
+        migrations.RunPython(fill_score_histograms,
+                             migrations.RunPython.noop),
+        migrations.RunPython(reviews.search.restore_fts_triggers,
+                             migrations.RunPython.noop),
+    ]
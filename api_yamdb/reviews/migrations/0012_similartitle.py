@@ -0,0 +1,32 @@
+# Generated by Django 3.2 on 2026-10-18 04:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_title_score_histogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarTitle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_to', to='reviews.title', verbose_name='Похожее произведение')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_titles', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'похожее произведение',
+                'verbose_name_plural': 'Похожие произведения',
+                'ordering': ('title', '-score'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='similartitle',
+            constraint=models.UniqueConstraint(fields=('title', 'similar'), name='unique_similar_title'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_similartitle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxemail',
+            name='claim_token',
+            field=models.UUIDField(blank=True, editable=False, null=True, verbose_name='Метка захвата отправителем'),
+        ),
+    ]
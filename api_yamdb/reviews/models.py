@@ -4,12 +4,14 @@ from django.core.validators import (
     MinValueValidator
 )
 from django.db import models
+from django.utils import timezone
 
 from api.validators import validator_for_username
 from reviews.constants import (EMAIL_FIELD_MAX_LENGTH,
                                MAX_STR_VALUE_LENGTH, MAX_VALUE_SCORE,
                                MIN_VALUE_SCORE, NAME_FIELD_MAX_LENGTH,
                                ROLE_MAX_LENGTH, USERNAME_FIELD_MAX_LENGTH)
+from reviews.search import FTS_TABLE, SearchDocumentField
 from reviews.validators import validate_year
 
 
@@ -68,6 +70,9 @@ class BaseGenreCategory(models.Model):
     class Meta:
         abstract = True
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=('name',), name='%(class)s_name_idx'),
+        ]
 
     def __str__(self):
         return self.name[:MAX_STR_VALUE_LENGTH]
@@ -111,16 +116,140 @@ class Title(models.Model):
         related_name='titles',
         verbose_name='Жанр'
     )
+    rating = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Рейтинг'
+    )
+    reviews_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок'
+    )
+    reviews_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество отзывов'
+    )
+    weighted_rating = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Взвешенный рейтинг'
+    )
+    # Гистограмма оценок: по счётчику на каждую оценку, см.
+    # SCORE_COUNT_FIELDS.
+    score_1_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 1'
+    )
+    score_2_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 2'
+    )
+    score_3_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 3'
+    )
+    score_4_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 4'
+    )
+    score_5_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 5'
+    )
+    score_6_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 6'
+    )
+    score_7_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 7'
+    )
+    score_8_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 8'
+    )
+    score_9_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 9'
+    )
+    score_10_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 10'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'произведения'
         ordering = ('-year', 'name',)
+        indexes = [
+            models.Index(
+                fields=('-year', 'name'),
+                name='title_year_name_idx'
+            ),
+            models.Index(
+                fields=('category', '-year', 'name'),
+                name='title_category_year_name_idx'
+            ),
+            models.Index(
+                fields=('rating', 'id'),
+                name='title_rating_idx'
+            ),
+            models.Index(
+                fields=('name', 'id'),
+                name='title_name_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name[:MAX_STR_VALUE_LENGTH]
 
 
+# Поля гистограммы оценок произведения по значению оценки.
+SCORE_COUNT_FIELDS = {
+    score: f'score_{score}_count'
+    for score in range(MIN_VALUE_SCORE, MAX_VALUE_SCORE + 1)
+}
+
+
+class TitleSearch(models.Model):
+    """Строка полнотекстового индекса произведения (FTS5, только SQLite).
+
+    Таблица и триггеры синхронизации создаются миграцией.
+    """
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search',
+        verbose_name='Произведение'
+    )
+    document = SearchDocumentField(db_column=FTS_TABLE)
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = FTS_TABLE
+
+
 class GenreTitle(models.Model):
     title_id = models.ForeignKey(
         Title,
@@ -154,6 +283,10 @@ class BaseCommentReview(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
     author = models.ForeignKey(
         YamdbUser,
         verbose_name='Автор',
@@ -193,6 +326,12 @@ class Review(BaseCommentReview):
         verbose_name = 'отзыв'
         verbose_name_plural = 'Отзывы'
         default_related_name = 'reviews'
+        indexes = [
+            models.Index(
+                fields=('title', '-pub_date', '-id'),
+                name='review_title_pub_date_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=('author', 'title'),
@@ -213,3 +352,175 @@ class Comment(BaseCommentReview):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         default_related_name = 'comments'
+        indexes = [
+            models.Index(
+                fields=('review', '-pub_date', '-id'),
+                name='comment_review_pub_date_idx'
+            ),
+        ]
+
+
+class LeaderboardEntry(models.Model):
+    """Произведение в топе: общем, категории или жанра.
+
+    Состав топов пересобирает команда refresh_leaderboards, порядок
+    внутри топа берётся из текущего взвешенного рейтинга.
+    """
+    ALL = 'all'
+    CATEGORY = 'category'
+    GENRE = 'genre'
+    KIND_CHOICES = (
+        (ALL, 'Все произведения'),
+        (CATEGORY, 'Категория'),
+        (GENRE, 'Жанр'),
+    )
+
+    kind = models.CharField(
+        max_length=max(len(kind) for kind, _ in KIND_CHOICES),
+        choices=KIND_CHOICES,
+        verbose_name='Топ'
+    )
+    slug = models.SlugField(
+        blank=True,
+        db_index=False,
+        verbose_name='Slug категории или жанра'
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries',
+        verbose_name='Произведение'
+    )
+
+    class Meta:
+        verbose_name = 'место в топе'
+        verbose_name_plural = 'Топы произведений'
+        ordering = ('kind', 'slug')
+        constraints = [
+            models.UniqueConstraint(
+                fields=('kind', 'slug', 'title'),
+                name='unique_leaderboard_title'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.slug}: {self.title_id}'
+
+
+class SimilarTitle(models.Model):
+    """Сосед произведения по оценкам зрителей.
+
+    Заполняется командой build_similar_titles.
+    """
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='similar_titles',
+        verbose_name='Произведение'
+    )
+    similar = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name='Похожее произведение'
+    )
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        verbose_name = 'похожее произведение'
+        verbose_name_plural = 'Похожие произведения'
+        ordering = ('title', '-score')
+        constraints = [
+            models.UniqueConstraint(
+                fields=('title', 'similar'),
+                name='unique_similar_title'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.title_id} ~ {self.similar_id}: {self.score:.3f}'
+
+
+class ImportCheckpoint(models.Model):
+    filename = models.CharField(
+        max_length=NAME_FIELD_MAX_LENGTH,
+        unique=True,
+        verbose_name='Файл'
+    )
+    byte_offset = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Смещение в байтах'
+    )
+    rows = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Загружено строк'
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        verbose_name='SHA-256 загруженной части'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Обновлено'
+    )
+
+    class Meta:
+        verbose_name = 'контрольная точка импорта'
+        verbose_name_plural = 'Контрольные точки импорта'
+        ordering = ('filename',)
+
+    def __str__(self):
+        return f'{self.filename}: {self.rows}'
+
+
+class OutboxEmail(models.Model):
+    recipient = models.EmailField(
+        max_length=EMAIL_FIELD_MAX_LENGTH,
+        verbose_name='Получатель'
+    )
+    subject = models.CharField(
+        max_length=NAME_FIELD_MAX_LENGTH,
+        verbose_name='Тема'
+    )
+    message = models.TextField(verbose_name='Текст')
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+    send_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Отправить после'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток отправки'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата отправки'
+    )
+    claim_token = models.UUIDField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Метка захвата отправителем'
+    )
+
+    class Meta:
+        verbose_name = 'письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=('sent_at', 'send_after'),
+                name='outbox_pending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'[:MAX_STR_VALUE_LENGTH]
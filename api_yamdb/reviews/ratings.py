@@ -0,0 +1,172 @@
+import heapq
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast, NullIf
+from django.utils import timezone
+
+from api.cache import get_api_cache
+from reviews.constants import MAX_VALUE_SCORE, MIN_VALUE_SCORE
+from reviews.models import (SCORE_COUNT_FIELDS, GenreTitle, LeaderboardEntry,
+                            Review, Title)
+
+MEAN_SCORE_KEY = 'ratings:mean_score'
+BATCH_SIZE = 500
+
+
+def compute_mean_score() -> float:
+    totals = Title.objects.aggregate(
+        score_sum=Sum('reviews_sum'), score_count=Sum('reviews_count')
+    )
+    if not totals['score_count']:
+        return (MIN_VALUE_SCORE + MAX_VALUE_SCORE) / 2
+    return totals['score_sum'] / totals['score_count']
+
+
+def get_mean_score() -> float:
+    """Средняя оценка по всем отзывам, закэшированная в процессе."""
+    cache = get_api_cache()
+    mean = cache.get(MEAN_SCORE_KEY)
+    if mean is None:
+        mean = compute_mean_score()
+        cache.set(MEAN_SCORE_KEY, mean, settings.WEIGHTED_RATING_MEAN_TIMEOUT)
+    return mean
+
+
+def weighted_rating(score_sum: int, score_count: int, mean: float):
+    """Байесовский рейтинг: средняя, стянутая к общей средней оценке.
+
+    Пока у произведения меньше WEIGHTED_RATING_MIN_REVIEWS отзывов,
+    основной вес у общей средней, поэтому одна десятка не обгоняет
+    сотни девяток.
+    """
+    if not score_count:
+        return None
+    min_reviews = settings.WEIGHTED_RATING_MIN_REVIEWS
+    return (score_sum + min_reviews * mean) / (score_count + min_reviews)
+
+
+def apply_review_score(title_id: int, added: Optional[int] = None,
+                       removed: Optional[int] = None):
+    """Учитывает добавленную и/или снятую оценку произведения.
+
+    Сдвигает сумму, число оценок и гистограмму и пересчитывает рейтинги.
+    Все выражения UPDATE вычисляются по старым значениям строки,
+    поэтому рейтинг считается из уже сдвинутых суммы и количества.
+    """
+    score_delta = (added or 0) - (removed or 0)
+    count_delta = (added is not None) - (removed is not None)
+    histogram = {}
+    if added is not None:
+        histogram[SCORE_COUNT_FIELDS[added]] = F(SCORE_COUNT_FIELDS[added]) + 1
+    if removed is not None:
+        histogram[SCORE_COUNT_FIELDS[removed]] = (
+            F(SCORE_COUNT_FIELDS[removed]) - 1
+        )
+    new_sum = F('reviews_sum') + score_delta
+    new_count = F('reviews_count') + count_delta
+    min_reviews = settings.WEIGHTED_RATING_MIN_REVIEWS
+    Title.objects.filter(pk=title_id).update(
+        **histogram,
+        reviews_sum=new_sum,
+        reviews_count=new_count,
+        rating=(Cast(new_sum, FloatField())
+                / NullIf(Cast(new_count, FloatField()), 0.0)),
+        weighted_rating=Case(
+            When(reviews_count__gt=-count_delta, then=(
+                (Cast(new_sum, FloatField()) + min_reviews * get_mean_score())
+                / (Cast(new_count, FloatField()) + min_reviews)
+            )),
+            default=Value(None),
+            output_field=FloatField()
+        ),
+        # Not Now(): SQLite's CURRENT_TIMESTAMP drops the microseconds
+        # that ETags and Last-Modified rely on.
+        updated_at=timezone.now(),
+    )
+
+
+def collect_review_stats() -> dict[int, tuple[int, int]]:
+    """Возвращает {title_id: (сумма оценок, число отзывов)} по таблице
+    отзывов."""
+    return {
+        row['title_id']: (row['score_sum'], row['score_count'])
+        for row in Review.objects.order_by().values('title_id').annotate(
+            score_sum=Sum('score'),
+            score_count=Count('id'),
+        )
+    }
+
+
+def collect_score_histograms() -> dict[int, dict[str, int]]:
+    """Возвращает {title_id: {поле счётчика: число оценок}}."""
+    histograms = {}
+    for row in Review.objects.order_by().values('title_id', 'score').annotate(
+        score_count=Count('id')
+    ):
+        histograms.setdefault(row['title_id'], {})[
+            SCORE_COUNT_FIELDS[row['score']]
+        ] = row['score_count']
+    return histograms
+
+
+def expected_rating(score_sum: int, score_count: int):
+    return score_sum / score_count if score_count else None
+
+
+def refresh_leaderboards(size: int = None) -> tuple[int, int]:
+    """Пересчитывает взвешенные рейтинги и пересобирает топы.
+
+    Возвращает (число обновлённых рейтингов, число мест в топах).
+    """
+    size = size or settings.LEADERBOARD_SIZE
+    mean = compute_mean_score()
+    get_api_cache().set(MEAN_SCORE_KEY, mean,
+                        settings.WEIGHTED_RATING_MEAN_TIMEOUT)
+
+    genres = {}
+    for title_id, slug in GenreTitle.objects.order_by().values_list(
+        'title_id_id', 'genre_id__slug'
+    ):
+        genres.setdefault(title_id, []).append(slug)
+
+    changed = []
+    boards = {}
+    titles = Title.objects.only(
+        'id', 'category__slug', 'reviews_sum', 'reviews_count',
+        'weighted_rating'
+    ).select_related('category').order_by('pk')
+    for title in titles.iterator(chunk_size=BATCH_SIZE):
+        rating = weighted_rating(title.reviews_sum, title.reviews_count,
+                                 mean)
+        if rating != title.weighted_rating:
+            title.weighted_rating = rating
+            changed.append(title)
+        if rating is None:
+            continue
+        scopes = [(LeaderboardEntry.ALL, '')]
+        if title.category is not None:
+            scopes.append((LeaderboardEntry.CATEGORY, title.category.slug))
+        scopes.extend((LeaderboardEntry.GENRE, slug)
+                      for slug in genres.get(title.pk, ()))
+        for scope in scopes:
+            board = boards.setdefault(scope, [])
+            entry = (rating, -title.pk)
+            if len(board) < size:
+                heapq.heappush(board, entry)
+            elif entry > board[0]:
+                heapq.heapreplace(board, entry)
+
+    entries = [
+        LeaderboardEntry(kind=kind, slug=slug, title_id=-negative_id)
+        for (kind, slug), board in boards.items()
+        for _, negative_id in board
+    ]
+    with transaction.atomic():
+        Title.objects.bulk_update(changed, ('weighted_rating',),
+                                  batch_size=BATCH_SIZE)
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+    return len(changed), len(entries)
@@ -0,0 +1,113 @@
+import re
+
+from django.db import connection, models
+from django.db.models import Q
+
+FTS_TABLE = 'reviews_title_fts'
+
+# External content table: FTS5 stores only the index and reads
+# name/description from reviews_title by rowid.
+CREATE_TABLE_SQL = f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        name, description,
+        content='reviews_title', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+# SQLite drops triggers together with the table, and Django rebuilds
+# reviews_title on most field changes: such migrations must run
+# restore_fts_triggers afterwards.
+CREATE_TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON reviews_title BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON reviews_title BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    # Rating and timestamp updates don't touch the index.
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_au
+    AFTER UPDATE OF name, description ON reviews_title BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+]
+
+DROP_TRIGGERS_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+]
+
+REBUILD_SQL = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+
+CREATE_FTS_SQL = [CREATE_TABLE_SQL, *CREATE_TRIGGERS_SQL, REBUILD_SQL]
+
+DROP_FTS_SQL = [*DROP_TRIGGERS_SQL, f'DROP TABLE IF EXISTS {FTS_TABLE}']
+
+
+def run_on_sqlite(schema_editor, statements):
+    # FTS5 exists only in SQLite; other backends fall back to icontains.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def restore_fts_triggers(apps, schema_editor):
+    run_on_sqlite(schema_editor,
+                  [*DROP_TRIGGERS_SQL, *CREATE_TRIGGERS_SQL, REBUILD_SQL])
+
+
+TERM_RE = re.compile(r'\w+')
+
+
+class SearchDocumentField(models.TextField):
+    """Скрытый столбец FTS5 с именем таблицы, по которому идёт MATCH."""
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+def build_match_query(text):
+    """Превращает ввод пользователя в запрос FTS5 из префиксных термов.
+
+    Каждое слово берётся в кавычки, поэтому операторы FTS5 во вводе
+    не интерпретируются; термы объединяются через AND.
+    """
+    return ' '.join(f'"{term}"*' for term in TERM_RE.findall(text))
+
+
+def search_titles(queryset, text):
+    """Фильтрует произведения по названию и описанию.
+
+    На SQLite используется индекс FTS5 и сортировка по BM25, на других
+    базах — icontains по обоим полям.
+    """
+    query = build_match_query(text)
+    if not query:
+        return queryset
+    if connection.vendor != 'sqlite':
+        return queryset.filter(
+            Q(name__icontains=text) | Q(description__icontains=text)
+        )
+    return queryset.filter(search__document__match=query).order_by(
+        'search__rank', 'id'
+    )
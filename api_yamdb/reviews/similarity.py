@@ -0,0 +1,101 @@
+import heapq
+import math
+from itertools import groupby
+from operator import itemgetter
+from typing import Iterator
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+
+from reviews.models import Review, SimilarTitle
+
+BATCH_SIZE = 5000
+
+
+def get_liked_reviews(min_score: int):
+    return Review.objects.filter(score__gte=min_score)
+
+
+def get_title_norms(min_score: int) -> dict[int, float]:
+    """Длины столбцов матрицы пользователь × произведение."""
+    return {
+        title_id: math.sqrt(squares)
+        for title_id, squares in get_liked_reviews(min_score).order_by(
+        ).values('title_id').annotate(
+            squares=Sum(F('score') * F('score'))
+        ).values_list('title_id', 'squares')
+    }
+
+
+def iter_user_rows(min_score: int) -> Iterator[list[tuple[int, int]]]:
+    """Строки матрицы: [(title_id, score), ...] одного пользователя.
+
+    Отзывы читаются потоком по индексу (author, title), поэтому
+    в памяти одновременно только строка одного пользователя.
+    """
+    reviews = get_liked_reviews(min_score).order_by(
+        'author_id', 'title_id'
+    ).values_list('author_id', 'title_id', 'score')
+    for _, row in groupby(reviews.iterator(chunk_size=BATCH_SIZE),
+                          key=itemgetter(0)):
+        yield [(title_id, score) for _, title_id, score in row]
+
+
+def find_neighbours(chunk: set[int], norms: dict[int, float], count: int,
+                    min_score: int) -> dict[int, list[tuple[float, int]]]:
+    """Top-k косинусных соседей для произведений из `chunk`.
+
+    Скалярные произведения копятся только для строк матрицы chunk × все
+    произведения, так что память ограничена размером пачки.
+    """
+    dots = {title_id: {} for title_id in chunk}
+    for row in iter_user_rows(min_score):
+        if len(row) < 2:
+            continue
+        for title_id, score in row:
+            if title_id not in chunk:
+                continue
+            title_dots = dots[title_id]
+            for other_id, other_score in row:
+                if other_id != title_id:
+                    title_dots[other_id] = (title_dots.get(other_id, 0)
+                                            + score * other_score)
+    return {
+        title_id: heapq.nlargest(count, (
+            (dot / (norms[title_id] * norms[other_id]), other_id)
+            for other_id, dot in title_dots.items()
+        ))
+        for title_id, title_dots in dots.items()
+    }
+
+
+def build_similar_titles(count: int = None, min_score: int = None,
+                         chunk_size: int = None) -> tuple[int, int]:
+    """Пересчитывает таблицу похожих произведений пачками.
+
+    Возвращает (число произведений, число сохранённых соседей).
+    """
+    count = count or settings.SIMILAR_TITLES_COUNT
+    min_score = min_score or settings.SIMILAR_TITLES_MIN_SCORE
+    chunk_size = chunk_size or settings.SIMILAR_TITLES_CHUNK_SIZE
+    norms = get_title_norms(min_score)
+    title_ids = sorted(norms)
+    stored = 0
+    SimilarTitle.objects.exclude(
+        title_id__in=get_liked_reviews(min_score).values('title_id')
+    ).delete()
+    for start in range(0, len(title_ids), chunk_size):
+        chunk = set(title_ids[start:start + chunk_size])
+        neighbours = find_neighbours(chunk, norms, count, min_score)
+        entries = [
+            SimilarTitle(title_id=title_id, similar_id=other_id,
+                         score=score)
+            for title_id, best in neighbours.items()
+            for score, other_id in best
+        ]
+        with transaction.atomic():
+            SimilarTitle.objects.filter(title_id__in=chunk).delete()
+            SimilarTitle.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+        stored += len(entries)
+    return len(title_ids), stored
@@ -0,0 +1,99 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from reviews.models import Review, Title
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def test_01_rating_follows_review_writes(self, admin_client, admin,
+                                             user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        title_url = self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        review_url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=title_id, review_id=reviews[1]['id']
+        )
+
+        response = user_client.patch(review_url, data={'score': 9})
+        assert response.status_code == HTTPStatus.OK
+        assert admin_client.get(title_url).json()['rating'] == 7, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'изменении оценки отзыва.'
+        )
+
+        response = user_client.delete(review_url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        title = Title.objects.get(pk=title_id)
+        assert (title.reviews_sum, title.reviews_count) == (5, 1)
+        assert admin_client.get(title_url).json()['rating'] == 5, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'удалении отзыва.'
+        )
+
+    def test_02_recalculate_ratings_command(self, admin_client, admin,
+                                            user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        call_command('recalculate_ratings', '--check')
+
+        Title.objects.filter(pk=titles[0]['id']).update(
+            rating=None, reviews_sum=0, reviews_count=0
+        )
+        with pytest.raises(CommandError):
+            call_command('recalculate_ratings', '--check')
+
+        call_command('recalculate_ratings')
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating, title.reviews_sum, title.reviews_count) == (
+            5, 10, 2
+        )
+        call_command('recalculate_ratings', '--check')
+
+    def test_03_cascade_and_direct_writes(self, admin_client, admin,
+                                          user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        review = Review.objects.filter(author=admin).first()
+        review.score = 1
+        review.save()
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        call_command('recalculate_ratings', '--check')
+        title = Title.objects.get(pk=review.title_id)
+        assert (title.rating, title.reviews_count, title.score_1_count) == (
+            1, 1, 1
+        ), (
+            'Проверьте, что рейтинг пересчитывается и при изменении отзыва '
+            'вне API, и при каскадном удалении отзывов пользователя.'
+        )
+
+    def test_04_review_moved_to_another_title(self, admin_client, admin,
+                                              user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        review = Review.objects.get(author=admin)
+        review.title_id = titles[1]['id']
+        review.score = 9
+        review.save()
+        call_command('recalculate_ratings', '--check')
+        counters = [
+            Title.objects.values_list('rating', 'reviews_count').get(
+                pk=title['id']
+            ) for title in titles[:2]
+        ]
+        assert counters == [(5, 1), (9, 1)], (
+            'Проверьте, что при переносе отзыва на другое произведение '
+            'оценка снимается со старого и добавляется новому.'
+        )
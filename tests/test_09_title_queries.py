@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_many_titles, create_titles
+
+# Read budgets include the max(updated_at)/count probe for conditional GET.
+TITLE_LIST_QUERIES = 4
+TITLE_DETAIL_QUERIES = 3
+TITLE_WRITE_QUERIES = 13
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleQueries:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def test_01_title_list_queries(self, admin_client, client):
+        titles, categories, genres = create_titles(admin_client)
+        with CaptureQueriesContext(connection) as few_titles:
+            response = client.get(self.TITLES_URL)
+        assert response.status_code == HTTPStatus.OK
+
+        create_many_titles(admin_client, genres, categories, 8)
+        with CaptureQueriesContext(connection) as full_page:
+            response = client.get(self.TITLES_URL)
+        assert len(response.json()['results']) == 10
+        assert len(few_titles) == len(full_page), (
+            f'Проверьте, что число запросов к БД при GET-запросе к '
+            f'`{self.TITLES_URL}` не зависит от количества произведений '
+            f'на странице.'
+        )
+        assert len(full_page) <= TITLE_LIST_QUERIES
+
+    def test_02_title_detail_queries(self, admin_client, client,
+                                     django_assert_max_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        with django_assert_max_num_queries(TITLE_DETAIL_QUERIES):
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+
+    def test_03_title_write_queries(self, admin_client,
+                                    django_assert_max_num_queries):
+        titles, categories, genres = create_titles(admin_client)
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        data = {
+            'name': 'Новое название',
+            'genre': [genre['slug'] for genre in genres],
+            'category': categories[1]['slug'],
+        }
+        with django_assert_max_num_queries(TITLE_WRITE_QUERIES):
+            response = admin_client.patch(url, data=data)
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()['genre']) == len(genres)
+
+        data['name'] = 'Другое произведение'
+        data['year'] = 1999
+        with django_assert_max_num_queries(TITLE_WRITE_QUERIES):
+            response = admin_client.post(self.TITLES_URL, data=data)
+        assert response.status_code == HTTPStatus.CREATED
@@ -0,0 +1,82 @@
+import base64
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_many_titles, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10KeysetPagination:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_page_number_is_default(self, admin_client, client):
+        create_titles(admin_client)
+        data = client.get(self.TITLES_URL).json()
+        assert data['count'] == 2
+        assert 'cursor' not in (data['next'] or '')
+
+    def test_02_cursor_walks_all_titles(self, admin_client, client):
+        titles, categories, genres = create_titles(admin_client)
+        create_many_titles(admin_client, genres, categories, 19)
+        expected = [
+            title['id'] for title in
+            client.get(self.TITLES_URL, {'page': 1}).json()['results']
+            + client.get(self.TITLES_URL, {'page': 2}).json()['results']
+            + client.get(self.TITLES_URL, {'page': 3}).json()['results']
+        ]
+
+        response = client.get(self.TITLES_URL, {'cursor': ''})
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data
+        assert data['previous'] is None
+        pages = [data]
+        while data['next']:
+            data = client.get(data['next']).json()
+            pages.append(data)
+        received = [title['id'] for page in pages for title in page['results']]
+        assert received == expected, (
+            'Проверьте, что курсорная пагинация отдаёт произведения в том же '
+            'порядке, что и постраничная, без пропусков и повторов.'
+        )
+
+        previous = client.get(pages[-1]['previous']).json()
+        assert previous['results'] == pages[-2]['results']
+
+        response = client.get(self.TITLES_URL, {'cursor': 'broken'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_cursor_values_match_key_fields(self, admin_client, client):
+        create_titles(admin_client)
+        cursor = base64.urlsafe_b64encode(
+            json.dumps({'v': ['x', 'y', 1], 'r': 0}).encode()
+        ).decode()
+        response = client.get(self.TITLES_URL, {'cursor': cursor})
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что курсор со значениями не того типа отклоняется '
+            'ответом 404.'
+        )
+
+    @pytest.mark.parametrize('payload, params', [
+        ('{"v":[1e400,"x",1],"r":0}', {}),
+        ('{"v":[%d,"x",1],"r":0}' % 10 ** 30, {}),
+        ('{"v":[2000,"x",%d],"r":0}' % 10 ** 30, {}),
+        ('{"v":[NaN,"x",1],"r":0}', {}),
+        ('{"v":[Infinity,1],"r":0}', {'ordering': '-rating'}),
+        ('{"v":["2020-01-01T00:00:00",%d],"r":0}' % 10 ** 30, 'reviews'),
+    ])
+    def test_04_out_of_range_cursor_values(self, admin_client, client,
+                                           payload, params):
+        titles, _, _ = create_titles(admin_client)
+        url = self.TITLES_URL
+        if params == 'reviews':
+            url, params = f'{url}{titles[0]["id"]}/reviews/', {}
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        response = client.get(url, {**params, 'cursor': cursor})
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что курсор с бесконечными или не помещающимися '
+            'в столбец числами отклоняется ответом 404.'
+        )
@@ -0,0 +1,27 @@
+import pytest
+from django.core.management import call_command
+
+from api.management.commands.check_query_plans import (build_querysets,
+                                                       is_bad_plan)
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11QueryPlans:
+
+    def test_01_api_querysets_use_indexes(self, admin_client, admin,
+                                          user_client, user):
+        create_comments(admin_client, {admin: admin_client, user: user_client})
+        call_command('check_query_plans')
+
+    def test_02_feed_and_precomputed_views_are_checked(
+            self, admin_client, admin, user_client, user):
+        create_comments(admin_client, {admin: admin_client, user: user_client})
+        plans = {label: queryset.explain()
+                 for label, queryset in build_querysets()}
+        for label in ('UsersViewSet feed', 'TitleViewSet facets genre',
+                      'LeaderboardView all', 'TitleViewSet similar'):
+            assert label in plans, (
+                f'Проверьте, что check_query_plans проверяет `{label}`.'
+            )
+            assert not is_bad_plan(plans[label]), plans[label]
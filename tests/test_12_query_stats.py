@@ -0,0 +1,50 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12QueryStats:
+
+    QUERY_STATS_URL = '/api/v1/query-stats/'
+
+    @pytest.fixture(autouse=True)
+    def sample_every_request(self, settings):
+        settings.QUERY_STATS_SAMPLE_RATE = 1.0
+
+    def test_01_server_timing_header(self, admin_client, user_client,
+                                     client):
+        create_titles(admin_client)
+        response = admin_client.get('/api/v1/titles/')
+        assert 'db;dur=' in response.get('Server-Timing', ''), (
+            'Проверьте, что ответ API администратору содержит заголовок '
+            '`Server-Timing` с временем работы БД.'
+        )
+        for other_client in (client, user_client):
+            response = other_client.get('/api/v1/titles/')
+            assert not response.has_header('Server-Timing'), (
+                'Проверьте, что время работы БД не раскрывается '
+                'обычным пользователям и анонимам.'
+            )
+
+    def test_02_route_stats(self, admin_client, user_client, client):
+        assert admin_client.delete(
+            self.QUERY_STATS_URL
+        ).status_code == HTTPStatus.NO_CONTENT
+        create_titles(admin_client)
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/', {'year': 1984})
+
+        assert client.get(
+            self.QUERY_STATS_URL
+        ).status_code == HTTPStatus.UNAUTHORIZED
+        assert user_client.get(
+            self.QUERY_STATS_URL
+        ).status_code == HTTPStatus.FORBIDDEN
+        response = admin_client.get(self.QUERY_STATS_URL)
+        assert response.status_code == HTTPStatus.OK
+        stats = response.json()['GET api/v1/titles/$']
+        assert stats['requests'] == 2
+        assert stats['queries'] >= 2 * stats['requests']
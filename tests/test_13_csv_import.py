@@ -0,0 +1,116 @@
+import shutil
+import subprocess
+import sys
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from api.cache import VERSION_KEY, get_model_versions
+from reviews.models import Comment, GenreTitle, ImportCheckpoint, Review, Title
+
+READ_CACHE_SCRIPT = (
+    'import sys, django; django.setup(); '
+    'from api.cache import get_api_cache; '
+    'print(get_api_cache().get(sys.argv[1]))'
+)
+NEW_REVIEW_ROW = '1000,2,"Новый отзыв",100,7,2020-01-13T23:20:02.422Z\n'
+
+
+def read_in_other_process(settings, key):
+    return subprocess.run(
+        [sys.executable, '-c', READ_CACHE_SCRIPT, key],
+        cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13CsvImport:
+
+    def test_01_import_is_idempotent(self):
+        call_command('migrate_from_csv', '--batch-size', '10', '--workers', '2')
+        counts = (Title.objects.count(), GenreTitle.objects.count(),
+                  Review.objects.count(), Comment.objects.count())
+        assert all(counts)
+
+        call_command('migrate_from_csv', '--workers', '1', '--restart')
+        assert counts == (Title.objects.count(), GenreTitle.objects.count(),
+                          Review.objects.count(), Comment.objects.count())
+        call_command('recalculate_ratings', '--check')
+
+    @pytest.mark.parametrize('workers', ('1', '2'))
+    def test_02_import_resumes_from_checkpoint(self, settings, tmp_path,
+                                               capsys, workers):
+        shutil.copytree(settings.DATA_CSV_DIR, tmp_path, dirs_exist_ok=True)
+        settings.DATA_CSV_DIR = tmp_path
+        call_command('migrate_from_csv', '--batch-size', '10',
+                     '--workers', workers)
+        reviews_count = Review.objects.count()
+        checkpoint = ImportCheckpoint.objects.get(filename='review')
+        assert checkpoint.byte_offset == (tmp_path / 'review.csv').stat(
+        ).st_size
+        capsys.readouterr()
+
+        call_command('migrate_from_csv', '--workers', workers)
+        assert 'review: 0 rows' in capsys.readouterr().out, (
+            'Проверьте, что неизменённые файлы при повторном импорте '
+            'пропускаются.'
+        )
+
+        with open(tmp_path / 'review.csv', 'a', encoding='utf-8') as file:
+            file.write(NEW_REVIEW_ROW)
+        call_command('migrate_from_csv', '--workers', workers)
+        output = capsys.readouterr().out
+        assert 'review: 1 rows' in output
+        assert 'comments: 0 rows' in output
+        assert Review.objects.count() == reviews_count + 1
+        call_command('recalculate_ratings', '--check')
+
+    def test_03_parallel_parse_error(self, settings, tmp_path):
+        shutil.copytree(settings.DATA_CSV_DIR, tmp_path, dirs_exist_ok=True)
+        settings.DATA_CSV_DIR = tmp_path
+        with open(tmp_path / 'review.csv', 'a', encoding='utf-8') as file:
+            file.write(NEW_REVIEW_ROW.replace('1000', 'x', 1))
+        with pytest.raises(CommandError, match='review.csv row'):
+            call_command('migrate_from_csv', '--batch-size', '1',
+                         '--workers', '2')
+
+    def test_04_edited_file_is_not_reported_as_loaded(self, settings,
+                                                      tmp_path):
+        shutil.copytree(settings.DATA_CSV_DIR, tmp_path, dirs_exist_ok=True)
+        settings.DATA_CSV_DIR = tmp_path
+        call_command('migrate_from_csv', '--workers', '1')
+        path = tmp_path / 'category.csv'
+        path.write_text(path.read_text(encoding='utf-8').replace(
+            'Фильм', 'Кино', 1
+        ), encoding='utf-8')
+        with pytest.raises(CommandError, match='category.csv changed'):
+            call_command('migrate_from_csv', '--workers', '1')
+        call_command('migrate_from_csv', '--workers', '1', '--restart')
+
+    def test_05_new_genre_links_touch_titles(self, settings, tmp_path):
+        shutil.copytree(settings.DATA_CSV_DIR, tmp_path, dirs_exist_ok=True)
+        settings.DATA_CSV_DIR = tmp_path
+        call_command('migrate_from_csv', '--workers', '1')
+        updated_at = Title.objects.get(pk=1).updated_at
+        with open(tmp_path / 'genre_title.csv', 'a',
+                  encoding='utf-8') as file:
+            file.write('\n43,1,2\n')
+        call_command('migrate_from_csv', '--workers', '1')
+        assert Title.objects.get(pk=1).updated_at > updated_at, (
+            'Проверьте, что импорт связей жанров меняет дату изменения '
+            'произведения, иначе его ETag не изменится.'
+        )
+
+    def test_06_import_is_seen_by_other_processes(self, settings):
+        key = VERSION_KEY.format(label=Title._meta.label_lower)
+        [version] = get_model_versions([Title])
+        assert read_in_other_process(settings, key) == str(version), (
+            'Проверьте, что кэш API общий для процессов сервера и команд.'
+        )
+        call_command('migrate_from_csv', '--workers', '1')
+        [version] = get_model_versions([Title])
+        assert read_in_other_process(settings, key) == str(version), (
+            'Проверьте, что версия, сдвинутая импортом, видна другим '
+            'процессам.'
+        )
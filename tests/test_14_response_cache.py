@@ -0,0 +1,58 @@
+from http import HTTPStatus
+
+import pytest
+from django.db.models.deletion import Collector
+
+from reviews.models import (Comment, ImportCheckpoint, LeaderboardEntry,
+                            OutboxEmail, SimilarTitle)
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14ResponseCache:
+
+    CATEGORIES_URL = '/api/v1/categories/'
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def test_01_cached_list_skips_database(self, admin_client, client,
+                                           django_assert_num_queries):
+        create_titles(admin_client)
+        first = client.get(self.TITLES_URL).json()
+        with django_assert_num_queries(0):
+            second = client.get(self.TITLES_URL).json()
+        assert first == second
+
+    def test_02_writes_invalidate_cache(self, admin_client, client,
+                                        user_client):
+        titles, _, _ = create_titles(admin_client)
+        assert client.get(self.CATEGORIES_URL).json()['count'] == 2
+        admin_client.post(self.CATEGORIES_URL,
+                          data={'name': 'Музыка', 'slug': 'music'})
+        assert client.get(self.CATEGORIES_URL).json()['count'] == 3, (
+            'Проверьте, что создание категории сбрасывает кэш списка '
+            'категорий.'
+        )
+
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        assert client.get(url).json()['rating'] is None
+        create_single_review(user_client, titles[0]['id'], 'Текст', 8)
+        assert client.get(url).json()['rating'] == 8, (
+            'Проверьте, что новый отзыв сбрасывает кэш произведения.'
+        )
+
+        response = admin_client.delete(f'{self.CATEGORIES_URL}films/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert client.get(url).json()['category'] is None, (
+            'Проверьте, что удаление категории сбрасывает кэш произведений.'
+        )
+
+    @pytest.mark.parametrize('model', [
+        Comment, LeaderboardEntry, SimilarTitle, OutboxEmail,
+        ImportCheckpoint,
+    ])
+    def test_03_fast_delete_is_kept(self, model):
+        assert Collector('default').can_fast_delete(model.objects.all()), (
+            'Проверьте, что сигналы сброса кэша подключены только к '
+            'моделям, от которых зависят кэшированные ответы.'
+        )
@@ -0,0 +1,123 @@
+from http import HTTPStatus
+
+import pytest
+from django.utils.http import http_date
+
+from reviews.models import Genre, GenreTitle, Title
+from tests.utils import create_comments, create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15ConditionalGet:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENT_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        '{comment_id}/'
+    )
+
+    def test_01_title_list_etag(self, admin_client, admin, user_client,
+                                user, client, moderator_client):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        response = client.get(self.TITLES_URL)
+        etag = response['ETag']
+        assert not response.has_header('Last-Modified'), (
+            'Проверьте, что список не отдаёт `Last-Modified`: удаление '
+            'записи не меняет максимальную дату изменения.'
+        )
+
+        response = client.get(self.TITLES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+        assert not response.content
+
+        create_single_review(moderator_client, titles[1]['id'], 'Текст', 3)
+        response = client.get(self.TITLES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response['ETag'] != etag
+
+    def test_02_nested_not_modified_skips_main_query(
+            self, admin_client, admin, user_client, user, client,
+            django_assert_max_num_queries):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        etag = client.get(url)['ETag']
+        with django_assert_max_num_queries(2):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        url = self.COMMENT_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id'],
+            comment_id=comments[0]['id']
+        )
+        response = client.get(url)
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        user_client.patch(url.replace(str(comments[0]['id']),
+                                      str(comments[1]['id'])),
+                          data={'text': 'Другой текст'})
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_03_list_changes_after_delete(self, admin_client, admin,
+                                          user_client, user, client):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        etag = client.get(url)['ETag']
+        response = admin_client.delete(f'{url}{reviews[0]["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=http_date())
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что список не отвечает 304 по `If-Modified-Since`.'
+        )
+
+    def test_04_malformed_detail_id(self, admin_client, admin, user_client,
+                                    user, client):
+        _, _, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        for url in (
+            f'{self.TITLES_URL}abc/',
+            f'{self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]["id"])}'
+            'abc/',
+        ):
+            assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что GET-запрос к `{url}` возвращает 404.'
+            )
+
+    def test_05_genre_links_change_etag(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[1]['id'])
+        horror, comedy = (Genre.objects.get(slug=slug)
+                          for slug in ('horror', 'comedy'))
+        urls = (f'{self.TITLES_URL}{title.pk}/', self.TITLES_URL)
+        for write in (
+            lambda: GenreTitle.objects.create(title_id=title,
+                                              genre_id=comedy),
+            lambda: title.genre.add(horror),
+            lambda: title.genre.remove(horror),
+            lambda: comedy.titles.clear(),
+        ):
+            etags = [client.get(url)['ETag'] for url in urls]
+            write()
+            for url, etag in zip(urls, etags):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                assert response.status_code == HTTPStatus.OK, (
+                    'Проверьте, что изменение жанров произведения вне API '
+                    f'меняет ETag `{url}`.'
+                )
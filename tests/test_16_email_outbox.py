@@ -0,0 +1,71 @@
+import smtplib
+
+import pytest
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.utils import claim_outbox_emails, deliver_outbox_emails
+from reviews.models import OutboxEmail
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16EmailOutbox:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    SIGNUP_DATA = {'email': 'outbox@yamdb.fake', 'username': 'outbox'}
+
+    def test_01_signup_queues_email(self, client):
+        outbox_before_count = len(mail.outbox)
+        client.post(self.URL_SIGNUP, data=self.SIGNUP_DATA)
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что при регистрации письмо ставится в очередь, '
+            'а не отправляется в ходе запроса.'
+        )
+        assert OutboxEmail.objects.filter(
+            recipient=self.SIGNUP_DATA['email'], sent_at__isnull=True
+        ).exists()
+
+        call_command('send_outbox_emails')
+        assert len(mail.outbox) == outbox_before_count + 1
+        assert not OutboxEmail.objects.filter(sent_at__isnull=True).exists()
+
+    def test_02_failed_email_is_retried_later(self, client, monkeypatch):
+        def fail(self, fail_silently=False):
+            raise smtplib.SMTPException('server unavailable')
+
+        client.post(self.URL_SIGNUP, data=self.SIGNUP_DATA)
+        with monkeypatch.context() as patch:
+            patch.setattr(EmailMessage, 'send', fail)
+            call_command('send_outbox_emails')
+        email = OutboxEmail.objects.get()
+        assert email.sent_at is None
+        assert email.attempts == 1
+        assert email.last_error == 'server unavailable'
+
+        outbox_before_count = len(mail.outbox)
+        call_command('send_outbox_emails')
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что письмо с ошибкой отправки откладывается.'
+        )
+
+        OutboxEmail.objects.update(send_after=email.created_at)
+        call_command('send_outbox_emails')
+        assert len(mail.outbox) == outbox_before_count + 1
+
+    def test_03_claimed_emails_are_not_sent_twice(self, client, settings):
+        client.post(self.URL_SIGNUP, data=self.SIGNUP_DATA)
+        claimed = claim_outbox_emails(10, timezone.now())
+        assert len(claimed) == 1
+        outbox_before_count = len(mail.outbox)
+        assert deliver_outbox_emails() == (0, 0), (
+            'Проверьте, что письма, захваченные другим отправителем, '
+            'не отправляются повторно.'
+        )
+        assert len(mail.outbox) == outbox_before_count
+
+        # The first sender died: its claim expires.
+        settings.EMAIL_OUTBOX_CLAIM_TIMEOUT = 0
+        OutboxEmail.objects.update(send_after=timezone.now())
+        assert deliver_outbox_emails() == (1, 0)
@@ -0,0 +1,44 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Before the single-lookup validation a new signup ran 9 queries
+# and a repeated one ran 4.
+NEW_SIGNUP_QUERIES = 4
+REPEATED_SIGNUP_QUERIES = 3
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17SignupQueries:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    def test_01_queries_per_signup(self, client):
+        data = {'email': 'bench@yamdb.fake', 'username': 'bench'}
+        with CaptureQueriesContext(connection) as new_signup:
+            response = client.post(self.URL_SIGNUP, data=data)
+        assert response.status_code == HTTPStatus.OK
+        with CaptureQueriesContext(connection) as repeated_signup:
+            response = client.post(self.URL_SIGNUP, data=data)
+        assert response.status_code == HTTPStatus.OK
+        assert len(new_signup) <= NEW_SIGNUP_QUERIES
+        assert len(repeated_signup) <= REPEATED_SIGNUP_QUERIES
+
+    def test_02_conflicts_in_one_lookup(self, client,
+                                        django_assert_max_num_queries):
+        client.post(self.URL_SIGNUP,
+                    data={'email': 'a@yamdb.fake', 'username': 'a'})
+        client.post(self.URL_SIGNUP,
+                    data={'email': 'b@yamdb.fake', 'username': 'b'})
+        with django_assert_max_num_queries(1):
+            response = client.post(
+                self.URL_SIGNUP,
+                data={'email': 'a@yamdb.fake', 'username': 'b'}
+            )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'email' in response.json()
+        response = client.post(self.URL_SIGNUP,
+                               data={'email': 'c@yamdb.fake', 'username': 'b'})
+        assert 'username' in response.json()
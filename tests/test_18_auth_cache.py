@@ -0,0 +1,60 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+User = get_user_model()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18AuthCache:
+
+    USER_ME_URL = '/api/v1/users/me/'
+    CATEGORIES_URL = '/api/v1/categories/'
+
+    def test_01_user_is_loaded_once(self, user_client):
+        user_client.get(self.CATEGORIES_URL, {'search': 'first'})
+        with CaptureQueriesContext(connection) as context:
+            user_client.get(self.CATEGORIES_URL, {'search': 'second'})
+        assert not any('reviews_yamdbuser' in query['sql']
+                       for query in context), (
+            'Проверьте, что аутентифицированный запрос берёт пользователя '
+            'из кэша.'
+        )
+
+    def test_02_role_change_invalidates_cache(self, admin_client, user,
+                                              user_client):
+        data = {'name': 'Музыка', 'slug': 'music'}
+        response = user_client.post(self.CATEGORIES_URL, data=data)
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+        response = admin_client.patch(f'/api/v1/users/{user.username}/',
+                                      data={'role': 'admin'})
+        assert response.status_code == HTTPStatus.OK
+        response = user_client.post(self.CATEGORIES_URL, data=data)
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что смена роли пользователя сбрасывает его '
+            'закэшированную запись.'
+        )
+
+    def test_03_inactive_user_rejected(self, user, user_client):
+        assert user_client.get(self.USER_ME_URL).status_code == HTTPStatus.OK
+        user.is_active = False
+        user.save()
+        response = user_client.get(self.USER_ME_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_04_profile_patch_keeps_fresh_role(self, user, user_client):
+        user_client.get(self.USER_ME_URL)
+        # Another worker changes the role; this process keeps its entry.
+        User.objects.filter(pk=user.pk).update(role='moderator')
+        response = user_client.patch(self.USER_ME_URL,
+                                     data={'bio': 'Новое описание'})
+        assert response.status_code == HTTPStatus.OK
+        user.refresh_from_db()
+        assert (user.role, user.bio) == ('moderator', 'Новое описание'), (
+            'Проверьте, что изменение профиля не записывает роль из '
+            'закэшированного пользователя.'
+        )
@@ -0,0 +1,117 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments
+
+REVIEW_POST_QUERIES = 5
+REVIEW_PATCH_QUERIES = 5
+REVIEW_DELETE_QUERIES = 6
+COMMENT_POST_QUERIES = 2
+COMMENT_PATCH_QUERIES = 3
+COMMENT_DELETE_QUERIES = 4
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19ReviewWriteQueries:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+    COMMENT_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        '{comment_id}/'
+    )
+
+    def test_01_review_write_queries(self, admin_client, admin, user_client,
+                                     user, moderator_client,
+                                     django_assert_max_num_queries):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        with django_assert_max_num_queries(REVIEW_POST_QUERIES):
+            response = moderator_client.post(
+                self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id']),
+                data={'text': 'Отзыв', 'score': 6}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+
+        url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[1]['id']
+        )
+        with django_assert_max_num_queries(REVIEW_PATCH_QUERIES):
+            response = user_client.patch(url, data={'score': 9})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['author'] == user.username
+
+        with django_assert_max_num_queries(REVIEW_PATCH_QUERIES):
+            response = moderator_client.patch(url, data={'text': 'Модерация'})
+        assert response.status_code == HTTPStatus.OK
+
+        with django_assert_max_num_queries(REVIEW_DELETE_QUERIES):
+            response = user_client.delete(url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+    def test_02_comment_write_queries(self, admin_client, admin, user_client,
+                                      user, django_assert_max_num_queries):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        with django_assert_max_num_queries(COMMENT_POST_QUERIES):
+            response = user_client.post(
+                self.COMMENTS_URL_TEMPLATE.format(
+                    title_id=titles[0]['id'], review_id=reviews[0]['id']
+                ),
+                data={'text': 'Комментарий'}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+
+        response = user_client.post(
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=titles[1]['id'], review_id=reviews[0]['id']
+            ),
+            data={'text': 'Комментарий'}
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что отзыв ищется только среди отзывов указанного '
+            'произведения.'
+        )
+
+        url = self.COMMENT_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id'],
+            comment_id=comments[1]['id']
+        )
+        with django_assert_max_num_queries(COMMENT_PATCH_QUERIES):
+            response = user_client.patch(url, data={'text': 'Новый текст'})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['author'] == user.username
+
+        with django_assert_max_num_queries(COMMENT_DELETE_QUERIES):
+            response = user_client.delete(url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+    def test_03_duplicate_review_rejected_by_constraint(
+            self, admin_client, admin, user_client, user):
+        _, _, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        rating = user_client.get(title_url).json()['rating']
+
+        response = user_client.post(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            data={'text': 'Ещё один отзыв', 'score': 1}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что повторный отзыв на произведение возвращает '
+            'ответ со статусом 400.'
+        )
+        assert 'non_field_errors' in response.json()
+        assert user_client.get(title_url).json()['rating'] == rating, (
+            'Проверьте, что отклонённый отзыв не меняет рейтинг '
+            'произведения.'
+        )
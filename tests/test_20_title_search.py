@@ -0,0 +1,74 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def search(self, client, text):
+        response = client.get(self.TITLES_URL, {'search': text})
+        assert response.status_code == HTTPStatus.OK
+        return [title['id'] for title in response.json()['results']]
+
+    def test_01_search_name_and_description(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        assert self.search(client, 'терминатор') == [titles[0]['id']], (
+            'Проверьте, что параметр `search` ищет по названию без учёта '
+            'регистра.'
+        )
+        assert self.search(client, 'yippie') == [titles[1]['id']], (
+            'Проверьте, что параметр `search` ищет по описанию.'
+        )
+        assert self.search(client, 'Креп оре') == [titles[1]['id']], (
+            'Проверьте, что параметр `search` находит слова по префиксу.'
+        )
+        assert self.search(client, 'терминатор орешек') == []
+        assert self.search(client, '" OR * (') == []
+
+    def test_02_search_ranked_by_relevance(self, admin_client, client):
+        _, categories, genres = create_titles(admin_client)
+        ids = []
+        for name, description in (
+            ('Сад', 'Осенний сад у дома'),
+            ('Вишнёвый сад', 'Сад, сад и ещё раз сад'),
+        ):
+            response = admin_client.post(self.TITLES_URL, data={
+                'name': name,
+                'year': 2000,
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+                'description': description,
+            })
+            ids.append(response.json()['id'])
+        assert self.search(client, 'сад') == ids[::-1], (
+            'Проверьте, что результаты поиска отсортированы по релевантности.'
+        )
+
+    def test_03_search_index_follows_title_changes(self, admin_client,
+                                                   client):
+        titles, _, _ = create_titles(admin_client)
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        response = admin_client.patch(url, data={'name': 'Робокоп'})
+        assert response.status_code == HTTPStatus.OK
+        assert self.search(client, 'терминатор') == []
+        assert self.search(client, 'робокоп') == [titles[0]['id']], (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'произведения.'
+        )
+
+        admin_client.delete(url)
+        assert self.search(client, 'робокоп') == []
+        assert self.search(client, 'back') == []
+
+    def test_04_name_filter_still_works(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get(self.TITLES_URL, {'name': 'рмина'})
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[0]['id']
+        ]
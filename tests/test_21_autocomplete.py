@@ -0,0 +1,133 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+
+from api.autocomplete import IndexState, autocomplete_index
+from api.cache import VERSION_KEY, get_api_cache
+from reviews.constants import AUTOCOMPLETE_MAX_LIMIT
+from reviews.models import Title
+from tests.utils import create_reviews, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Autocomplete:
+
+    URL = '/api/v1/autocomplete/'
+
+    def names(self, client, q, **params):
+        response = client.get(self.URL, {'q': q, **params})
+        assert response.status_code == HTTPStatus.OK
+        return [item['name'] for item in response.json()]
+
+    def test_01_prefix_matches(self, admin_client, client):
+        titles, categories, genres = create_titles(admin_client)
+        assert self.names(client, 'терм') == ['Терминатор']
+        assert self.names(client, 'оре') == ['Крепкий орешек'], (
+            'Проверьте, что автодополнение находит слова в середине '
+            'названия.'
+        )
+        assert self.names(client, 'КРЕПКИЙ о') == ['Крепкий орешек']
+        response = client.get(self.URL, {'q': genres[0]['name'][:3]})
+        assert {
+            'type': 'genre', 'name': genres[0]['name'],
+            'slug': genres[0]['slug'],
+        } in response.json()
+        response = client.get(self.URL, {'q': 'терм'})
+        assert response.json() == [
+            {'type': 'title', 'name': 'Терминатор', 'id': titles[0]['id']}
+        ]
+
+    def test_02_limit_type_and_ranking(self, admin_client, admin, client,
+                                       user_client, user):
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        admin_client.patch(f'/api/v1/titles/{titles[1]["id"]}/',
+                           data={'name': 'Терминатор 2'})
+        assert self.names(client, 'терминатор') == [
+            'Терминатор', 'Терминатор 2'
+        ], 'Проверьте, что совпадения отсортированы по рейтингу.'
+        assert self.names(client, 'терминатор', limit=1) == ['Терминатор']
+        assert self.names(client, 'т', type='genre') == []
+
+        response = client.get(self.URL, {'q': 'т', 'limit': 0})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = client.get(self.URL)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_served_from_memory(self, admin_client, client,
+                                   django_assert_num_queries):
+        _, categories, genres = create_titles(admin_client)
+        self.names(client, 'терм')
+        with django_assert_num_queries(0):
+            assert self.names(client, 'кре') == ['Крепкий орешек']
+
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Крестный отец',
+            'year': 1972,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        # Only genre and category title counts are recounted.
+        with django_assert_num_queries(2):
+            assert set(self.names(client, 'кре')) == {
+                'Крепкий орешек', 'Крестный отец'
+            }
+        admin_client.delete(f'/api/v1/titles/{response.json()["id"]}/')
+        assert self.names(client, 'кре') == ['Крепкий орешек']
+
+    def test_04_rebuilt_after_foreign_writes(self, admin_client, client):
+        create_titles(admin_client)
+        self.names(client, 'терм')
+        # Another worker writes: no signals here, only a version bump.
+        Title.objects.bulk_create([Title(name='Термит', year=2000)])
+        get_api_cache().incr(VERSION_KEY.format(label='reviews.title'))
+        assert set(self.names(client, 'терм')) == {'Терминатор', 'Термит'}, (
+            'Проверьте, что индекс перестраивается после записей других '
+            'процессов.'
+        )
+
+    def test_05_top_matches_follow_writes(self):
+        items = {('title', pk): {'name': f'Альфа {pk}', 'weight': pk % 7}
+                 for pk in range(AUTOCOMPLETE_MAX_LIMIT * 2)}
+        state = IndexState(dict(items))
+        for pk in range(0, AUTOCOMPLETE_MAX_LIMIT * 2, 3):
+            items[('title', pk)] = {**items[('title', pk)], 'weight': pk % 5}
+            state.set_weight(('title', pk), pk % 5)
+        for pk in range(1, AUTOCOMPLETE_MAX_LIMIT * 2, 4):
+            del items[('title', pk)]
+            state.replace(('title', pk), None)
+        expected = IndexState(items)
+        for prefix in ('а', 'ал', 'аль', '1', 'альфа 1'):
+            assert state.search(prefix, AUTOCOMPLETE_MAX_LIMIT) == (
+                expected.search(prefix, AUTOCOMPLETE_MAX_LIMIT)
+            ), (
+                'Проверьте, что лучшие совпадения префиксов поправляются '
+                'при записях так же, как при полной перестройке индекса.'
+            )
+
+    def test_06_expired_index_is_rebuilt_in_background(
+            self, admin_client, client, settings, monkeypatch):
+        create_titles(admin_client)
+        self.names(client, 'терм')
+        settings.LOCAL_INDEX_MAX_AGE = 0
+        release = threading.Event()
+        rebuild = autocomplete_index.rebuild
+
+        def held_rebuild(snapshot):
+            release.wait()
+            rebuild(snapshot)
+
+        monkeypatch.setattr(autocomplete_index, 'rebuild', held_rebuild)
+        # Not seen by versions, only by the age limit.
+        Title.objects.bulk_create([Title(name='Термит', year=2000)])
+        assert self.names(client, 'терм') == ['Терминатор'], (
+            'Проверьте, что устаревший индекс перестраивается в фоне, '
+            'а запрос не ждёт перестройки и отвечает по прежнему.'
+        )
+        release.set()
+        autocomplete_index.builder.join()
+        assert set(self.names(client, 'терм')) == {'Терминатор', 'Термит'}
+        autocomplete_index.builder.join()
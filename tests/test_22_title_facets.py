@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_many_titles, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22TitleFacets:
+
+    FACETS_URL = '/api/v1/titles/facets/'
+
+    def test_01_facet_counts(self, admin_client, client):
+        titles, categories, genres = create_titles(admin_client)
+        create_many_titles(admin_client, genres, categories, 3)
+        response = client.get(self.FACETS_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.FACETS_URL}` доступен '
+            'без токена.'
+        )
+        data = response.json()
+        assert data['genre'] == sorted(
+            ({'slug': genre['slug'], 'count': 4} for genre in genres),
+            key=lambda facet: facet['slug']
+        )
+        assert data['category'] == [
+            {'slug': categories[0]['slug'], 'count': 3},
+            {'slug': categories[1]['slug'], 'count': 2},
+        ]
+        assert data['year'] == [
+            {'year': 2000, 'count': 3},
+            {'year': 1988, 'count': 1},
+            {'year': 1984, 'count': 1},
+        ]
+
+    def test_02_facets_follow_title_filters(self, admin_client, client):
+        titles, categories, genres = create_titles(admin_client)
+        create_many_titles(admin_client, genres, categories, 3)
+        data = client.get(
+            self.FACETS_URL, {'category': categories[1]['slug']}
+        ).json()
+        assert data['category'] == [
+            {'slug': categories[1]['slug'], 'count': 2}
+        ], (
+            'Проверьте, что фасеты считаются по результату фильтров '
+            '`TitleFilter`.'
+        )
+        assert data['year'] == [
+            {'year': 2000, 'count': 1}, {'year': 1988, 'count': 1}
+        ]
+        data = client.get(
+            self.FACETS_URL, {'genre': genres[2]['slug'], 'year': 1988}
+        ).json()
+        assert data['genre'] == [{'slug': genres[2]['slug'], 'count': 1}]
+
+    def test_03_facets_queries(self, admin_client, client,
+                               django_assert_max_num_queries):
+        _, categories, genres = create_titles(admin_client)
+        create_many_titles(admin_client, genres, categories, 5)
+        with django_assert_max_num_queries(3):
+            client.get(self.FACETS_URL)
+        with django_assert_max_num_queries(0):
+            client.get(self.FACETS_URL)
+
+        admin_client.delete(f'/api/v1/genres/{genres[0]["slug"]}/')
+        slugs = [
+            facet['slug'] for facet in client.get(self.FACETS_URL).json()[
+                'genre'
+            ]
+        ]
+        assert genres[0]['slug'] not in slugs, (
+            'Проверьте, что фасеты пересчитываются после изменения жанров.'
+        )
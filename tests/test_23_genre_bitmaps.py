@@ -0,0 +1,101 @@
+from http import HTTPStatus
+
+import pytest
+
+from api.cache import VERSION_KEY, get_api_cache
+from reviews.models import Genre, GenreTitle
+from tests.utils import create_title, create_titles, get_title_ids
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23GenreBitmaps:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_and_or_not(self, admin_client, client):
+        titles, categories, genres = create_titles(admin_client)
+        horror, comedy, drama = (genre['slug'] for genre in genres)
+        third = create_title(admin_client, 'Третье', [comedy, drama],
+                             categories[0]['slug'])
+        # Titles come in (-year, name) order: third, second, first.
+        first, second = titles[0]['id'], titles[1]['id']
+
+        assert get_title_ids(client, genre_all=f'{horror},{comedy}') == [
+            first
+        ]
+        assert get_title_ids(client, genre_all=comedy) == [third, first]
+        assert get_title_ids(client, genre_any=f'{horror},{drama}') == [
+            third, second, first
+        ], 'Проверьте, что `genre_any` возвращает произведения любого жанра.'
+        assert get_title_ids(client, genre_not=horror) == [third, second], (
+            'Проверьте, что `genre_not` исключает произведения жанра.'
+        )
+        assert get_title_ids(
+            client, genre_any=f'{comedy},{drama}', genre_not=horror
+        ) == [third, second]
+        assert get_title_ids(client, genre_all=f'{comedy},unknown') == []
+        assert get_title_ids(client, genre_any=comedy.upper(),
+                             category=categories[0]['slug']) == [third, first]
+        assert get_title_ids(client, genre=drama) == [third, second]
+
+    def test_02_bitmaps_follow_genre_changes(self, admin_client, client):
+        titles, categories, genres = create_titles(admin_client)
+        horror, comedy, drama = (genre['slug'] for genre in genres)
+        first, second = titles[0]['id'], titles[1]['id']
+        assert get_title_ids(client, genre_any=drama) == [second]
+
+        response = admin_client.patch(f'{self.TITLES_URL}{first}/',
+                                      data={'genre': [drama]})
+        assert response.status_code == HTTPStatus.OK
+        assert get_title_ids(client, genre_any=drama) == [second, first], (
+            'Проверьте, что битовые карты обновляются при изменении '
+            'жанров произведения.'
+        )
+        assert get_title_ids(client, genre_any=horror) == []
+
+        admin_client.delete(f'/api/v1/genres/{drama}/')
+        assert get_title_ids(client, genre_any=drama) == []
+        third = create_title(admin_client, 'Третье', [comedy],
+                             categories[0]['slug'])
+        assert get_title_ids(client, genre_all=comedy) == [third]
+
+    def test_03_rebuilt_after_foreign_writes(self, admin_client, client):
+        titles, _, genres = create_titles(admin_client)
+        assert get_title_ids(client, genre_any=genres[2]['slug']) == [
+            titles[1]['id']
+        ]
+        GenreTitle.objects.bulk_create([GenreTitle(
+            title_id_id=titles[0]['id'],
+            genre_id=Genre.objects.get(slug=genres[2]['slug'])
+        )])
+        get_api_cache().incr(VERSION_KEY.format(label='reviews.title'))
+        assert get_title_ids(client, genre_any=genres[2]['slug']) == [
+            titles[1]['id'], titles[0]['id']
+        ]
+
+    def test_04_queries(self, admin_client, client,
+                        django_assert_max_num_queries):
+        _, _, genres = create_titles(admin_client)
+        client.get(self.TITLES_URL, {'genre_any': genres[0]['slug']})
+        with django_assert_max_num_queries(4):
+            response = client.get(self.TITLES_URL, {
+                'genre_all': f'{genres[0]["slug"]},{genres[1]["slug"]}',
+                'genre_not': genres[2]['slug'],
+            })
+        assert response.status_code == HTTPStatus.OK
+
+    def test_05_rebuilt_after_max_age(self, admin_client, client, settings):
+        titles, _, genres = create_titles(admin_client)
+        get_title_ids(client, genre_any=genres[2]['slug'])
+        # A worker with its own LocMemCache: no signals, no version bump.
+        GenreTitle.objects.bulk_create([GenreTitle(
+            title_id_id=titles[0]['id'],
+            genre_id=Genre.objects.get(slug=genres[2]['slug'])
+        )])
+        settings.LOCAL_INDEX_MAX_AGE = 0
+        # Another URL: cached responses expire by API_CACHE_TIMEOUT.
+        assert get_title_ids(client, genre_any=genres[2]['slug'],
+                             page=1) == [titles[1]['id'], titles[0]['id']], (
+            'Проверьте, что битовые карты перестраиваются по истечении '
+            '`LOCAL_INDEX_MAX_AGE` даже без смены версий.'
+        )
@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import (create_many_titles, create_scored_titles,
+                         get_title_ids)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24RatingFilters:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def rated_titles(self, admin_client, user_client):
+        return create_scored_titles(
+            admin_client, [('Без отзывов', [0], 0)],
+            {user_client: {0: 9, 1: 4}}
+        )
+
+    def test_01_rating_range(self, admin_client, user_client, client):
+        (high, low, _), _, _ = self.rated_titles(admin_client, user_client)
+        assert get_title_ids(client, rating_min=8) == [high], (
+            'Проверьте, что `rating_min` отбирает произведения с рейтингом '
+            'не ниже заданного.'
+        )
+        assert get_title_ids(client, rating_max=5) == [low]
+        assert get_title_ids(client, rating_min=4, rating_max=9) == [low, high]
+        assert get_title_ids(client, rating_min=10) == []
+        response = client.get(self.TITLES_URL, {'rating_min': 'много'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_ordering(self, admin_client, user_client, client):
+        (high, low, unrated), _, _ = self.rated_titles(admin_client,
+                                                       user_client)
+        assert get_title_ids(client, ordering='-rating') == [
+            high, low, unrated
+        ], (
+            'Проверьте, что `ordering=-rating` сортирует произведения по '
+            'убыванию рейтинга.'
+        )
+        assert get_title_ids(client, ordering='rating') == [unrated, low, high]
+        assert get_title_ids(client, ordering='year') == [high, low, unrated]
+        assert get_title_ids(client, ordering='name') == [unrated, low, high]
+        assert get_title_ids(client, ordering='-rating', rating_min=1) == [
+            high, low
+        ]
+        response = client.get(self.TITLES_URL, {'ordering': 'score'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    @pytest.mark.parametrize('ordering', ('-rating', 'rating', '-name'))
+    def test_03_cursor_follows_ordering(self, admin_client, user_client,
+                                        client, ordering):
+        _, categories, genres = self.rated_titles(admin_client, user_client)
+        create_many_titles(admin_client, genres, categories, 15)
+        expected = [
+            title['id'] for page in (1, 2, 3)
+            for title in client.get(self.TITLES_URL, {
+                'ordering': ordering, 'page': page
+            }).json().get('results', [])
+        ]
+        data = client.get(self.TITLES_URL,
+                          {'ordering': ordering, 'cursor': ''}).json()
+        pages = [data]
+        while data['next']:
+            data = client.get(data['next']).json()
+            pages.append(data)
+        assert [title['id'] for page in pages
+                for title in page['results']] == expected, (
+            'Проверьте, что курсорная пагинация идёт в порядке `ordering`, '
+            'включая произведения без рейтинга.'
+        )
+        previous = client.get(pages[-1]['previous']).json()
+        assert previous['results'] == pages[-2]['results']
@@ -0,0 +1,81 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_scored_titles, get_title_ids
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25Leaderboards:
+
+    URL = '/api/v1/leaderboards/'
+
+    @pytest.fixture(autouse=True)
+    def min_reviews(self, settings):
+        settings.WEIGHTED_RATING_MIN_REVIEWS = 2
+
+    def rated_titles(self, admin_client, user_client, moderator_client):
+        # single: one 10; popular: 10, 10 and 9; flop: three 1s.
+        (single, popular, flop), categories, genres = create_scored_titles(
+            admin_client, [('Провал', [2], 1)], {
+                user_client: {0: 10, 1: 10, 2: 1},
+                admin_client: {1: 10, 2: 1},
+                moderator_client: {1: 9, 2: 1},
+            }
+        )
+        call_command('refresh_leaderboards')
+        return single, popular, flop, categories, genres
+
+    def test_01_weighted_order(self, admin_client, user_client,
+                               moderator_client, client):
+        single, popular, flop, _, _ = self.rated_titles(
+            admin_client, user_client, moderator_client
+        )
+        assert get_title_ids(client, self.URL) == [popular, single, flop], (
+            'Проверьте, что топ упорядочен по взвешенному рейтингу и '
+            'произведение с одной оценкой не обгоняет популярное.'
+        )
+        data = client.get(self.URL, {'limit': 1}).json()
+        assert len(data) == 1
+        assert data[0]['rating'] < 10
+        assert data[0]['weighted_rating'] == pytest.approx((29 + 2 * 6) / 5)
+
+    def test_02_category_and_genre(self, admin_client, user_client,
+                                   moderator_client, client):
+        single, popular, flop, categories, genres = self.rated_titles(
+            admin_client, user_client, moderator_client
+        )
+        assert get_title_ids(
+            client, self.URL, category=categories[1]['slug']
+        ) == [popular, flop]
+        assert get_title_ids(
+            client, self.URL, genre=genres[0]['slug']
+        ) == [single]
+        assert get_title_ids(client, self.URL, genre='unknown') == []
+        response = client.get(self.URL, {
+            'genre': genres[0]['slug'], 'category': categories[0]['slug']
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_review_writes_reorder_leaderboard(
+            self, admin_client, user_client, moderator_client, client,
+            django_assert_num_queries):
+        single, popular, flop, _, _ = self.rated_titles(
+            admin_client, user_client, moderator_client
+        )
+        reviews = moderator_client.get(
+            f'/api/v1/titles/{popular}/reviews/'
+        ).json()['results']
+        review_id = next(review['id'] for review in reviews
+                         if review['score'] == 9)
+        response = moderator_client.patch(
+            f'/api/v1/titles/{popular}/reviews/{review_id}/',
+            data={'score': 1}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert get_title_ids(client, self.URL) == [single, popular, flop], (
+            'Проверьте, что отзывы сразу меняют порядок внутри топа.'
+        )
+        with django_assert_num_queries(1):
+            client.get(self.URL)
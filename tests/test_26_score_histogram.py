@@ -0,0 +1,97 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Title
+from tests.utils import create_reviews, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26ScoreHistogram:
+
+    SCORES_URL_TEMPLATE = '/api/v1/titles/{title_id}/scores/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def histogram(self, client, title_id):
+        response = client.get(
+            self.SCORES_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json()
+
+    def test_01_histogram_follows_review_writes(self, admin_client, admin,
+                                                user_client, user,
+                                                moderator_client, client):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id = titles[0]['id']
+        create_single_review(moderator_client, title_id, 'Отзыв', 9)
+        data = self.histogram(client, title_id)
+        assert data['scores'] == {
+            str(score): {5: 2, 9: 1}.get(score, 0) for score in range(1, 11)
+        }, (
+            'Проверьте, что гистограмма оценок содержит по счётчику на '
+            'каждую оценку от 1 до 10.'
+        )
+        assert data['reviews_count'] == 3
+
+        review_url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=title_id, review_id=reviews[1]['id']
+        )
+        user_client.patch(review_url, data={'score': 1})
+        scores = self.histogram(client, title_id)['scores']
+        assert (scores['1'], scores['5'], scores['9']) == (1, 1, 1), (
+            'Проверьте, что гистограмма обновляется при изменении оценки.'
+        )
+
+        user_client.delete(review_url)
+        data = self.histogram(client, title_id)
+        assert (data['scores']['1'], data['reviews_count']) == (0, 2)
+
+    def test_02_histogram_is_single_read(self, admin_client, admin,
+                                         user_client, user, client,
+                                         django_assert_max_num_queries):
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        with django_assert_max_num_queries(1):
+            self.histogram(client, titles[0]['id'])
+        response = client.get(self.SCORES_URL_TEMPLATE.format(title_id=0))
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_recalculate_rebuilds_histogram(self, admin_client, admin,
+                                               user_client, user):
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        Title.objects.filter(pk=titles[0]['id']).update(score_5_count=0,
+                                                        score_3_count=4)
+        with pytest.raises(CommandError):
+            call_command('recalculate_ratings', '--check')
+        call_command('recalculate_ratings')
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_5_count, title.score_3_count) == (2, 0)
+
+    def test_04_malformed_id(self, client):
+        response = client.get(self.SCORES_URL_TEMPLATE.format(title_id='abc'))
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_05_title_reads_skip_histogram(self, admin_client, admin,
+                                           user_client, user, client):
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        with CaptureQueriesContext(connection) as context:
+            client.get('/api/v1/titles/')
+            client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert not any('score_1_count' in query['sql'] for query in context), (
+            'Проверьте, что список и карточка произведения не читают '
+            'счётчики гистограммы.'
+        )
@@ -0,0 +1,81 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Review, SimilarTitle
+from tests.utils import create_scored_titles, get_title_ids
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27SimilarTitles:
+
+    SIMILAR_URL_TEMPLATE = '/api/v1/titles/{title_id}/similar/'
+
+    def scored_titles(self, admin_client, user_client, moderator_client):
+        title_ids, _, _ = create_scored_titles(
+            admin_client, [('Третье', [0], 0)], {
+                admin_client: {0: 9, 1: 9, 2: 2},
+                user_client: {0: 8, 1: 10},
+                moderator_client: {0: 10, 2: 8},
+            }
+        )
+        return title_ids
+
+    def similar(self, client, title_id):
+        response = client.get(
+            self.SIMILAR_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json()
+
+    @pytest.mark.parametrize('chunk_size', (1, 1000))
+    def test_01_cosine_neighbours(self, admin_client, user_client,
+                                  moderator_client, client, chunk_size):
+        first, second, third = self.scored_titles(
+            admin_client, user_client, moderator_client
+        )
+        call_command('build_similar_titles', chunk_size=chunk_size)
+        data = self.similar(client, first)
+        assert [title['id'] for title in data] == [second, third], (
+            'Проверьте, что похожие произведения упорядочены по косинусной '
+            'близости оценок.'
+        )
+        assert data[0]['similarity'] == pytest.approx(
+            161 / ((81 + 64 + 100) ** 0.5 * (81 + 100) ** 0.5)
+        )
+        assert get_title_ids(
+            client, self.SIMILAR_URL_TEMPLATE.format(title_id=second)
+        ) == [first]
+        assert get_title_ids(
+            client, self.SIMILAR_URL_TEMPLATE.format(title_id=third)
+        ) == [first], (
+            'Проверьте, что низкие оценки не считаются совпадением вкусов.'
+        )
+
+    def test_02_single_read_and_missing_title(
+            self, admin_client, user_client, moderator_client, client,
+            django_assert_num_queries):
+        first, _, _ = self.scored_titles(
+            admin_client, user_client, moderator_client
+        )
+        call_command('build_similar_titles')
+        with django_assert_num_queries(1):
+            self.similar(client, first)
+        response = client.get(self.SIMILAR_URL_TEMPLATE.format(title_id=0))
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_rebuild_replaces_neighbours(self, admin_client, user_client,
+                                            moderator_client, client):
+        first, _, third = self.scored_titles(
+            admin_client, user_client, moderator_client
+        )
+        call_command('build_similar_titles')
+        Review.objects.filter(title_id=third).delete()
+        call_command('build_similar_titles')
+        assert self.similar(client, third) == []
+        assert not SimilarTitle.objects.filter(similar_id=third).exists()
+
+    def test_04_malformed_id(self, client):
+        response = client.get(self.SIMILAR_URL_TEMPLATE.format(title_id='abc'))
+        assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,82 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review
+from tests.utils import (create_scored_titles, create_single_review,
+                         create_title)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28UserFeed:
+
+    URL = '/api/v1/users/me/feed/'
+
+    def feed_titles(self, admin_client):
+        title_ids, _, _ = create_scored_titles(admin_client, [
+            ('Только жанр', [0], 1),
+            ('Жанр и категория', [1, 2], 0),
+        ])
+        return title_ids
+
+    def feed(self, client):
+        response = client.get(self.URL)
+        assert response.status_code == HTTPStatus.OK
+        return [(title['id'], title['affinity'])
+                for title in response.json()['results']]
+
+    def test_01_ranked_by_liked_genres_and_categories(self, admin_client,
+                                                      user_client):
+        liked, other, genre_only, both = self.feed_titles(admin_client)
+        create_single_review(user_client, liked, 'Отлично', 9)
+        assert self.feed(user_client) == [(both, 18), (genre_only, 9)], (
+            'Проверьте, что лента содержит непрочитанные произведения '
+            'любимых жанров и категорий, упорядоченные по сумме их весов.'
+        )
+
+    def test_02_review_writes_update_cached_affinity(
+            self, admin_client, user_client, django_assert_max_num_queries):
+        liked, other, genre_only, both = self.feed_titles(admin_client)
+        create_single_review(user_client, liked, 'Отлично', 9)
+        self.feed(user_client)
+        create_single_review(user_client, both, 'Плохо', 2)
+        create_single_review(user_client, other, 'Шедевр', 10)
+        assert self.feed(user_client) == [(genre_only, 19)], (
+            'Проверьте, что новые отзывы сразу меняют ленту и исключают '
+            'оценённые произведения.'
+        )
+        with django_assert_max_num_queries(4):
+            self.feed(user_client)
+
+    def test_03_affinity_is_not_rebuilt_per_request(self, admin_client,
+                                                    user_client):
+        liked, other, genre_only, both = self.feed_titles(admin_client)
+        create_single_review(user_client, liked, 'Отлично', 9)
+        expected = self.feed(user_client)
+        # A write that bypasses signals is not seen until the vector
+        # expires: the history is not re-read on every request.
+        Review.objects.filter(title_id=liked).update(score=1)
+        assert self.feed(user_client) == expected
+
+    def test_04_ranking_is_cached(self, admin_client, user_client):
+        liked, _, _, _ = self.feed_titles(admin_client)
+        create_single_review(user_client, liked, 'Отлично', 9)
+        self.feed(user_client)
+        with CaptureQueriesContext(connection) as queries:
+            self.feed(user_client)
+        assert not any('"affinity"' in query['sql']
+                       for query in queries.captured_queries), (
+            'Проверьте, что повторный запрос ленты берёт ранжирование '
+            'из кэша и читает из базы только произведения страницы.'
+        )
+        new = create_title(admin_client, 'Новинка', ['horror'], 'films')
+        assert (new, 18) in self.feed(user_client), (
+            'Проверьте, что новое произведение любимых жанра и категории '
+            'попадает в ленту.'
+        )
+
+    def test_05_anonymous(self, client):
+        response = client.get(self.URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
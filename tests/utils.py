@@ -244,6 +244,64 @@ def create_titles(admin_client):
     return result, categories, genres
 
 
+def create_many_titles(admin_client, genres, categories, count):
+    for idx in range(count):
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': f'Title {idx}',
+            'year': 2000,
+            'genre': [genre['slug'] for genre in genres],
+            'category': categories[idx % len(categories)]['slug'],
+        })
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Если POST-запрос администратора к `/api/v1/titles/` содержит '
+            'корректные данные - должен вернуться ответ со статусом 201.'
+        )
+
+
+def create_title(admin_client, name, genres, category, year=2000):
+    response = admin_client.post('/api/v1/titles/', data={
+        'name': name,
+        'year': year,
+        'genre': genres,
+        'category': category,
+    })
+    assert response.status_code == HTTPStatus.CREATED, (
+        'Если POST-запрос администратора к `/api/v1/titles/` содержит '
+        'корректные данные - должен вернуться ответ со статусом 201.'
+    )
+    return response.json()['id']
+
+
+def create_scored_titles(admin_client, extra_titles=(), scores=None):
+    """Произведения create_titles и `extra_titles` с отзывами.
+
+    extra_titles — [(название, номера жанров, номер категории)],
+    scores — {клиент: {номер произведения: оценка}}; номера относятся
+    к возвращаемому списку id.
+    """
+    titles, categories, genres = create_titles(admin_client)
+    title_ids = [title['id'] for title in titles]
+    for name, genre_indexes, category_index in extra_titles:
+        title_ids.append(create_title(
+            admin_client, name,
+            [genres[index]['slug'] for index in genre_indexes],
+            categories[category_index]['slug']
+        ))
+    for client, client_scores in (scores or {}).items():
+        for index, score in client_scores.items():
+            create_single_review(client, title_ids[index], 'Отзыв', score)
+    return title_ids, categories, genres
+
+
+def get_title_ids(client, url='/api/v1/titles/', **params):
+    response = client.get(url, params)
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+    if isinstance(data, dict):
+        data = data['results']
+    return [title['id'] for title in data]
+
+
 def create_reviews(admin_client, authors_map):
     titles, _, _ = create_titles(admin_client)
     result = []